@@ -31,11 +31,12 @@ Exit codes:
 
 from __future__ import annotations
 import argparse
+import functools
 import json
+import re
 import sys
 from pathlib import Path
 from typing import List, Tuple, Dict, Any
-from collections import OrderedDict
 
 # ---- Python version check ----
 if sys.version_info < (3, 7):
@@ -45,337 +46,208 @@ if sys.version_info < (3, 7):
 
 # ---- Helpers: robust scanning that respects strings and comments ----
 
+# All scanning is done on the raw UTF-8 bytes: every structural character is ASCII,
+# and multi-byte UTF-8 sequences never contain ASCII bytes, so no decoding is needed.
+
+# Indexing bytes yields ints, so the scanners compare against these byte values
+# instead of building one-character strings.
+SLASH, STAR, BACKSLASH, NEWLINE = b'/*\\\n'
+
+# Scanner dispatch: every byte maps to a small class number, so each hit costs one table
+# lookup and a few int compares rather than a chain of byte comparisons.
+OTHER, STRING, COMMENT, LBRACE, RBRACE, LBRACKET, RBRACKET, COMMA = range(8)
+BYTE_CLASS = bytearray(256)
+for _ch, _cls in ((b'"', STRING), (b"'", STRING), (b'/', COMMENT), (b'{', LBRACE), (b'}', RBRACE),
+                  (b'[', LBRACKET), (b']', RBRACKET), (b',', COMMA)):
+    BYTE_CLASS[ord(_ch)] = _cls
+BYTE_CLASS = bytes(BYTE_CLASS)
+del _ch, _cls
+
+# Each scanner jumps straight to the next character it cares about; everything
+# in between (whitespace, keys, values) is skipped by the regex engine in C.
+BRACKET_SCAN_RE = re.compile(rb'["\'/\[\]]')
+ITEM_SCAN_RE = re.compile(rb'["\'/\[\]{},]')
+
+# Quoted strings (group 1, kept), or comments and trailing commas (dropped), in a single C-level pass.
+# Unterminated strings and block comments run to the end of the text. A comma is trailing when only
+# whitespace and comments separate it from the next '}' or ']'; the lookahead's comment patterns
+# cannot backtrack into a comment body, so a '}' inside a comment never counts.
+JSONC_CLEAN_RE = re.compile(
+    rb'("[^"\\]*(?:\\.[^"\\]*)*"?|\'[^\'\\]*(?:\\.[^\'\\]*)*\'?)'
+    rb'|//[^\n]*'
+    rb'|/\*.*?(?:\*/|\Z)'
+    rb'|,(?=(?:\s|//[^\n]*(?:\n|\Z)|/\*[^*]*\*+(?:[^/*][^*]*\*+)*/)*[}\]])', re.DOTALL)
+
+# Cheap pre-check: without a '/' there are no comments, and without this there are no trailing commas.
+TRAILING_COMMA_RE = re.compile(rb',\s*[}\]]')
+
+# Output buffer for write_merged_file().
+WRITE_BUFFER_SIZE = 1 << 20
+
+
+def _skip_string(text: bytes, i: int, quote: int) -> int:
+    """
+    Return the index just past the string literal whose body starts at `i`
+    (i.e. `i` is the index after the opening quote). Honors backslash escapes.
+    Returns len(text) if the string is unterminated.
+    """
+
+    n = len(text)
+    find = text.find
+    while True:
+        j = find(quote, i)
+        if j < 0:
+            return n
+        # an odd number of backslashes before the quote means it is escaped
+        k = j
+        while k > i and text[k - 1] == BACKSLASH:
+            k -= 1
+        if (j - k) % 2 == 0:
+            return j + 1
+        i = j + 1
+
+
+def _skip_comment(text: bytes, i: int) -> int:
+    """
+    If a comment starts at `i`, return the index just past it (a line comment
+    ends before its newline); otherwise return -1.
+    """
 
-def find_top_level_array_bounds(text: str) -> Tuple[int, int]:
+    n = len(text)
+    if i + 1 >= n:
+        return -1
+    c2 = text[i + 1]
+    if c2 == SLASH:
+        j = text.find(NEWLINE, i + 2)
+        return n if j < 0 else j
+    if c2 == STAR:
+        j = text.find(b'*/', i + 2)
+        return n if j < 0 else j + 2
+    return -1
+
+
+def find_top_level_array_bounds(text: bytes) -> Tuple[int, int]:
     """
     Find the indices of the '[' and its matching ']' for the top-level array.
     Returns (index_of_open_bracket, index_of_matching_close_bracket).
     Raises ValueError if not found.
     """
 
-    i = 0
     n = len(text)
-    in_string = False
-    string_char = ''
-    esc = False
-    in_line_comment = False
-    in_block_comment = False
+    search = BRACKET_SCAN_RE.search
     depth = 0
     first_bracket = -1
+    i = 0
 
+    # one pass: ']' only counts once the first '[' has been seen
     while i < n:
+        m = search(text, i)
+        if m is None:
+            break
+        i = m.start()
         ch = text[i]
-        next2 = text[i:i + 2] if i + 2 <= n else ''
-        if in_line_comment:
-            if ch == '\n':
-                in_line_comment = False
-            i += 1
-            continue
-        if in_block_comment:
-            if next2 == '*/':
-                in_block_comment = False
-                i += 2
-            else:
-                i += 1
+        cls = BYTE_CLASS[ch]
+        if cls == STRING:
+            i = _skip_string(text, i + 1, ch)
             continue
-        if in_string:
-            if esc:
-                esc = False
-            elif ch == '\\':
-                esc = True
-            elif ch == string_char:
-                in_string = False
-            i += 1
+        if cls == COMMENT:
+            j = _skip_comment(text, i)
+            i = i + 1 if j < 0 else j
             continue
-        # not in string/comment
-        if next2 == '//':
-            in_line_comment = True
-            i += 2
-            continue
-        if next2 == '/*':
-            in_block_comment = True
-            i += 2
-            continue
-        if ch == '"' or ch == "'":
-            in_string = True
-            string_char = ch
-            i += 1
-            continue
-        if ch == '[':
+        if cls == LBRACKET:
             if first_bracket == -1:
                 first_bracket = i
-                depth = 1
-                i += 1
-                break
-            else:
-                depth += 1
-        i += 1
-
-    if first_bracket == -1:
-        raise ValueError(
-            "No top-level '[' found in file (is this a keybindings.json array?)")
-
-    # find matching ]
-    while i < n:
-        ch = text[i]
-        next2 = text[i:i + 2] if i + 2 <= n else ''
-        if in_line_comment:
-            if ch == '\n':
-                in_line_comment = False
-            i += 1
-            continue
-        if in_block_comment:
-            if next2 == '*/':
-                in_block_comment = False
-                i += 2
-            else:
-                i += 1
-            continue
-        if in_string:
-            if esc:
-                esc = False
-            elif ch == '\\':
-                esc = True
-            elif ch == string_char:
-                in_string = False
-            i += 1
-            continue
-        if next2 == '//':
-            in_line_comment = True
-            i += 2
-            continue
-        if next2 == '/*':
-            in_block_comment = True
-            i += 2
-            continue
-        if ch == '"' or ch == "'":
-            in_string = True
-            string_char = ch
-            i += 1
-            continue
-        if ch == '[':
             depth += 1
-        elif ch == ']':
+        elif cls == RBRACKET and first_bracket != -1:
             depth -= 1
             if depth == 0:
                 return first_bracket, i
         i += 1
 
+    if first_bracket == -1:
+        raise ValueError(
+            "No top-level '[' found in file (is this a keybindings.json array?)")
     raise ValueError("Matching ']' for top-level '[' not found")
 
 
-def split_top_level_array_items(array_inner: str) -> List[str]:
+def split_top_level_array_items(text: bytes, start: int = 0, end: int | None = None) -> List[Tuple[int, int]]:
     """
-    Given the string inside the top-level [ ... ] (excluding the brackets),
-    split into item raw text pieces, preserving comments and spacing around items.
+    Given the text and the bounds of the region inside the top-level [ ... ]
+    (excluding the brackets), split it into items, preserving comments and
+    spacing around items. Returns (start, end) offsets of each item's raw text,
+    so the region is scanned in place rather than copied.
     """
 
-    items: List[str] = []
-    i = 0
-    n = len(array_inner)
-    in_string = False
-    string_char = ''
-    esc = False
-    in_line_comment = False
-    in_block_comment = False
+    items: List[Tuple[int, int]] = []
+    if end is None:
+        end = len(text)
+    i = start
+    search = ITEM_SCAN_RE.search
     brace_depth = 0
     bracket_depth = 0
-    last_split = 0
+    last_split = start
 
-    while i < n:
-        ch = array_inner[i]
-        next2 = array_inner[i:i + 2] if i + 2 <= n else ''
-        if in_line_comment:
-            if ch == '\n':
-                in_line_comment = False
-            i += 1
-            continue
-        if in_block_comment:
-            if next2 == '*/':
-                in_block_comment = False
-                i += 2
-            else:
-                i += 1
-            continue
-        if in_string:
-            if esc:
-                esc = False
-            elif ch == '\\':
-                esc = True
-            elif ch == string_char:
-                in_string = False
-            i += 1
-            continue
-        # not in string/comment
-        if next2 == '//':
-            in_line_comment = True
-            i += 2
-            continue
-        if next2 == '/*':
-            in_block_comment = True
-            i += 2
+    while i < end:
+        m = search(text, i, end)
+        if m is None:
+            break
+        i = m.start()
+        ch = text[i]
+        cls = BYTE_CLASS[ch]
+        if cls == STRING:
+            i = _skip_string(text, i + 1, ch)
             continue
-        if ch == '"' or ch == "'":
-            in_string = True
-            string_char = ch
-            i += 1
+        if cls == COMMENT:
+            j = _skip_comment(text, i)
+            i = i + 1 if j < 0 else j
             continue
         # track nested braces/brackets to detect commas at top-level of the array
-        if ch == '{':
+        if cls == LBRACE:
             brace_depth += 1
-        elif ch == '}':
+        elif cls == RBRACE:
             brace_depth -= 1
-        elif ch == '[':
+        elif cls == LBRACKET:
             bracket_depth += 1
-        elif ch == ']':
+        elif cls == RBRACKET:
             bracket_depth -= 1
-        elif ch == ',' and brace_depth == 0 and bracket_depth == 0:
+        elif cls == COMMA and brace_depth == 0 and bracket_depth == 0:
             # top-level comma separating items
-            item = array_inner[last_split:i]
-            items.append(item)
+            items.append((last_split, i))
             last_split = i + 1  # skip comma
         i += 1
 
-    # final piece
-    final = array_inner[last_split:]
-    if final.strip() != '':
-        items.append(final)
-    else:
-        # if final is whitespace/comments, attach to previous item if exists, otherwise keep it as an empty item
-        if items:
-            items[-1] = items[-1] + final
-        elif final.strip() != '':
-            items.append(final)
+    # final piece; a whitespace-only tail (e.g. after a trailing comma) is not an item,
+    # and the previous item keeps its bounds since trailing whitespace is never emitted
+    if text[last_split:end].strip() != b'':
+        items.append((last_split, end))
     # Strip nothing: keep items' raw text as-is so comments remain attached exactly where they were.
     return items
 
-# ---- Light-weight comment remover and trailing-comma cleaner used only for parsing items ----
-# NOTE: these functions are used only to produce a parseable JSON string for json.loads.
-# They DO NOT alter the original raw item text that will be preserved in the final output.
+# ---- Light-weight comment and trailing-comma cleaner used only for parsing items ----
+# NOTE: this is used only to produce a parseable JSON string for json.loads.
+# It DOES NOT alter the original raw item text that will be preserved in the final output.
 
 
-def remove_comments_from_string(s: str) -> str:
-    """Remove // and /* */ comments while respecting quoted strings."""
+def clean_item_text(s: bytes) -> bytes:
+    """Remove // and /* */ comments and trailing commas while respecting quoted strings."""
 
-    out_chars: List[str] = []
-    i = 0
-    n = len(s)
-    in_string = False
-    string_char = ''
-    esc = False
-    in_line_comment = False
-    in_block_comment = False
-
-    while i < n:
-        ch = s[i]
-        next2 = s[i:i + 2] if i + 2 <= n else ''
-        if in_line_comment:
-            if ch == '\n':
-                in_line_comment = False
-                out_chars.append(ch)
-            i += 1
-            continue
-        if in_block_comment:
-            if next2 == '*/':
-                in_block_comment = False
-                i += 2
-            else:
-                i += 1
-            continue
-        if in_string:
-            out_chars.append(ch)
-            if esc:
-                esc = False
-            elif ch == '\\':
-                esc = True
-            elif ch == string_char:
-                in_string = False
-            i += 1
-            continue
-        # not in string/comment
-        if next2 == '//':
-            in_line_comment = True
-            i += 2
-            continue
-        if next2 == '/*':
-            in_block_comment = True
-            i += 2
-            continue
-        if ch == '"' or ch == "'":
-            in_string = True
-            string_char = ch
-            out_chars.append(ch)
-            i += 1
-            continue
-        out_chars.append(ch)
-        i += 1
-    return ''.join(out_chars)
-
-
-def remove_trailing_commas(s: str) -> str:
-    """
-    Remove trailing commas before } or ] at the same syntactic level.
-    This works with the assumption that comments have already been removed.
-    """
-
-    out_chars: List[str] = []
-    i = 0
-    n = len(s)
-    in_string = False
-    string_char = ''
-    esc = False
-    # track { and [ for nesting, to know when comma is trailing
-    stack: List[str] = []
-    while i < n:
-        ch = s[i]
-        if in_string:
-            out_chars.append(ch)
-            if esc:
-                esc = False
-            elif ch == '\\':
-                esc = True
-            elif ch == string_char:
-                in_string = False
-            i += 1
-            continue
-        if ch == '"' or ch == "'":
-            in_string = True
-            string_char = ch
-            out_chars.append(ch)
-            i += 1
-            continue
-        if ch == '{' or ch == '[':
-            stack.append(ch)
-            out_chars.append(ch)
-            i += 1
-            continue
-        if ch == '}' or ch == ']':
-            # look back: if the last non-space char in out_chars is a comma, remove that comma
-            j = len(out_chars) - 1
-            while j >= 0 and out_chars[j].isspace():
-                j -= 1
-            if j >= 0 and out_chars[j] == ',':
-                # remove the comma
-                out_chars.pop(j)
-            if stack:
-                stack.pop()
-            out_chars.append(ch)
-            i += 1
-            continue
-        out_chars.append(ch)
-        i += 1
-    return ''.join(out_chars)
+    # strings are captured (and kept via \1); comments and trailing commas match outside the group and are dropped
+    return JSONC_CLEAN_RE.sub(rb'\1', s)
 
 
-def parse_item_to_object(item_raw: str) -> Any:
+def parse_item_to_object(item_raw: bytes) -> Any:
     """
     Try to parse an item (which is raw JSONC text for an object).
     Returns the parsed object on success, raises ValueError on parse failure.
     """
 
-    cleaned = remove_comments_from_string(item_raw)
-    cleaned = remove_trailing_commas(cleaned)
+    if b'/' in item_raw or TRAILING_COMMA_RE.search(item_raw):
+        cleaned = clean_item_text(item_raw)
+    else:
+        # fast path: no comments and no trailing commas, so there is nothing to clean
+        cleaned = item_raw
     # Strip leading/trailing whitespace so json.loads doesn't choke if there's surrounding newlines
+    # (json.loads accepts the UTF-8 bytes directly)
     cleaned = cleaned.strip()
     if not cleaned:
         raise ValueError("empty item after removing comments")
@@ -393,12 +265,26 @@ def make_key_from_obj(obj: Any) -> str:
     return "__NON_OBJECT__"
 
 
-def merge_keybinding_files(left_text: str, right_text: str, prefer: str, base: str = 'left') -> Tuple[str, List[str]]:
+@functools.lru_cache(maxsize=4096)
+def _parse_item_key(item_raw: bytes) -> str | None:
+    """
+    Return the key+when dedupe key for a raw item, or None if it parses to a non-object.
+    Cached by raw text, so an item repeated in either file is only cleaned and parsed once.
+    Raises ValueError on parse failure (failures are not cached).
+    """
+
+    obj = parse_item_to_object(item_raw)
+    if isinstance(obj, dict):
+        return make_key_from_obj(obj)
+    return None
+
+
+def merge_keybinding_files(left_text: bytes, right_text: bytes, prefer: str, base: str = 'left') -> Tuple[bytes, List[bytes], bytes, List[str]]:
     """
     Merge two JSONC keybinding files.
     prefer: 'left' or 'right'  (which file's binding wins on duplicates)
     base: 'left' or 'right'   (which file provides the wrapper/prefix/suffix)
-    Returns (merged_text, warnings)
+    Returns (prefix, merged_items, suffix, warnings); see write_merged_file()
     """
 
     # find array bounds in both files
@@ -406,73 +292,71 @@ def merge_keybinding_files(left_text: str, right_text: str, prefer: str, base: s
     right_l, right_r = find_top_level_array_bounds(right_text)
 
     left_prefix = left_text[:left_l + 1]   # include '['
-    left_inner = left_text[left_l + 1:left_r]
     left_suffix = left_text[left_r:]     # include ']' and rest
 
     right_prefix = right_text[:right_l + 1]
-    right_inner = right_text[right_l + 1:right_r]
     right_suffix = right_text[right_r:]
 
-    left_items_raw = split_top_level_array_items(left_inner)
-    right_items_raw = split_top_level_array_items(right_inner)
+    # scan each array in place; every item is sliced exactly once, and that
+    # slice is both parsed and kept for output
+    left_items_raw = [left_text[a:b] for a, b in split_top_level_array_items(left_text, left_l + 1, left_r)]
+    right_items_raw = [right_text[a:b] for a, b in split_top_level_array_items(right_text, right_l + 1, right_r)]
 
-    mapping: "OrderedDict[str, str]" = OrderedDict()
+    # dedupe key -> index into merged_items; a conflict overwrites the slot in place,
+    # which keeps the original position. Blank and unparsable fragments are never
+    # deduped, so they are only appended.
+    order: Dict[str, int] = {}
+    merged_items: List[bytes] = []
     warnings: List[str] = []
     left_keys_seen: set = set()
     right_keys_seen: set = set()
 
     # process left items
+    # trailing whitespace is never written, so each item is stripped once here and
+    # only the stripped text is parsed and stored
     for idx, raw in enumerate(left_items_raw):
-        raw_stripped = raw.rstrip()
-        if raw_stripped == '':
+        raw = raw.rstrip()
+        if raw == b'':
             # preserve blank/whitespace-only fragments
-            synthetic_key = f"__LEFT_BLANK_{idx}__"
-            mapping[synthetic_key] = raw
+            merged_items.append(raw)
             continue
         try:
-            obj = parse_item_to_object(raw)
-            if isinstance(obj, dict):
-                k = make_key_from_obj(obj)
-            else:
+            k = _parse_item_key(raw)
+            if k is None:
                 # non-object (e.g., a primitive), preserve as unique entry
                 k = f"__LEFT_NONOBJ_{idx}__"
-            mapping.setdefault(k, raw)
+            if k not in order:
+                order[k] = len(merged_items)
+                merged_items.append(raw)
             left_keys_seen.add(k)
         except Exception as e:
-            # preserve raw but mark as unparsable; give it a unique key so we don't try to dedupe it
-            synthetic = f"__LEFT_UNPARSED_{idx}__"
-            mapping[synthetic] = raw
+            # preserve raw but mark as unparsable; don't try to dedupe it
+            merged_items.append(raw)
             warnings.append(
                 f"Warning: left file item #{idx} could not be parsed as JSON: {e}")
 
     # process right items
     for idx, raw in enumerate(right_items_raw):
-        raw_stripped = raw.rstrip()
-        if raw_stripped == '':
-            synthetic_key = f"__RIGHT_BLANK_{idx}__"
-            mapping[synthetic_key] = mapping.get(synthetic_key, raw)
+        raw = raw.rstrip()
+        if raw == b'':
+            merged_items.append(raw)
             continue
         try:
-            obj = parse_item_to_object(raw)
-            if isinstance(obj, dict):
-                k = make_key_from_obj(obj)
-            else:
+            k = _parse_item_key(raw)
+            if k is None:
                 k = f"__RIGHT_NONOBJ_{idx}__"
             right_keys_seen.add(k)
-            if k in mapping:
-                # conflict
-                if prefer == 'right':
-                    # replace but keep insertion order (OrderedDict preserves key positions on assignment to existing key)
-                    mapping[k] = raw
-                else:
-                    # prefer left: keep existing
-                    pass
-            else:
+            i = order.get(k)
+            if i is None:
                 # new: append at end
-                mapping[k] = raw
+                order[k] = len(merged_items)
+                merged_items.append(raw)
+            elif prefer == 'right':
+                # conflict: replace in place so the item keeps its position
+                merged_items[i] = raw
+            # else prefer left: keep existing
         except Exception as e:
-            synthetic = f"__RIGHT_UNPARSED_{idx}__"
-            mapping[synthetic] = raw
+            merged_items.append(raw)
             warnings.append(
                 f"Warning: right file item #{idx} could not be parsed as JSON: {e}")
 
@@ -484,20 +368,42 @@ def merge_keybinding_files(left_text: str, right_text: str, prefer: str, base: s
         prefix = right_prefix
         suffix = right_suffix
 
-    # join items with commas between them. Do not alter item raw text.
-    merged_items = []
-    for raw in mapping.values():
-        # keep raw exactly as in source
-        merged_items.append(raw.rstrip())
+    return prefix, merged_items, suffix, warnings
 
-    if merged_items:
-        joined = ',\n'.join(item for item in merged_items)
-        merged_inner = '\n' + joined + '\n'
-    else:
-        merged_inner = '\n'
 
-    merged_text = prefix + merged_inner + suffix
-    return merged_text, warnings
+def read_jsonc_bytes(path: Path) -> bytes:
+    """
+    Read a JSONC file as raw UTF-8 bytes, translating '\r\n' and '\r' line endings
+    to '\n' the way reading it in text mode would.
+    """
+
+    data = path.read_bytes()
+    if b'\r' in data:
+        data = data.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    return data
+
+
+def write_merged_file(path: Path, prefix: bytes, merged_items: List[bytes], suffix: bytes) -> None:
+    """
+    Write the merged array to `path` piece by piece, with items joined by commas,
+    so the full merged text is never built in memory. Items are written as given;
+    merge_keybinding_files() has already removed their trailing whitespace.
+    The pieces are small, so a 1 MiB buffer batches them into few write() calls.
+    """
+
+    with path.open('wb', buffering=WRITE_BUFFER_SIZE) as f:
+        f.write(prefix)
+        f.write(b'\n')
+        first = True
+        for raw in merged_items:
+            if not first:
+                f.write(b',\n')
+            # keep raw exactly as in source (already right-stripped by the merge)
+            f.write(raw)
+            first = False
+        if not first:
+            f.write(b'\n')
+        f.write(suffix)
 
 
 def main(argv: List[str] | None = None) -> int:
@@ -524,25 +430,25 @@ def main(argv: List[str] | None = None) -> int:
     args = parser.parse_args(argv)
 
     try:
-        left_text = args.left.read_text(encoding='utf8')
+        left_text = read_jsonc_bytes(args.left)
     except Exception as e:
         sys.stderr.write(f"Error reading left file '{args.left}': {e}\n")
         return 2
     try:
-        right_text = args.right.read_text(encoding='utf8')
+        right_text = read_jsonc_bytes(args.right)
     except Exception as e:
         sys.stderr.write(f"Error reading right file '{args.right}': {e}\n")
         return 2
 
     try:
-        merged_text, warnings = merge_keybinding_files(
+        prefix, merged_items, suffix, warnings = merge_keybinding_files(
             left_text, right_text, args.prefer, base=args.base)
     except Exception as e:
         sys.stderr.write(f"Error merging files: {e}\n")
         return 2
 
     try:
-        args.out.write_text(merged_text, encoding='utf8')
+        write_merged_file(args.out, prefix, merged_items, suffix)
     except Exception as e:
         sys.stderr.write(f"Error writing output file '{args.out}': {e}\n")
         return 2
@@ -36,6 +36,16 @@ from typing import List
 
 # usage is handled by argparse: only show help when -h/--help is provided
 
+# Double-quoted strings (group 1, kept) or comments (dropped), in a single C-level pass; the
+# same approach keybindings-merge.py uses. Unterminated strings and block comments run to the end.
+# The first alternative drops a whole line, newline included, when it holds nothing but
+# whitespace and comments, so blank lines never reach the output.
+JSONC_COMMENT_RE = re.compile(
+    r'^(?:[ \t]|/\*[^*]*\*+(?:[^/*][^*]*\*+)*/)*(?://[^\n]*)?\n'
+    r'|("[^"\\]*(?:\\.[^"\\]*)*"?)|//[^\n]*|/\*.*?(?:\*/|\Z)',
+    re.DOTALL | re.MULTILINE,
+)
+
 
 def strip_comments(jsonc_string: str) -> str:
     """Return `jsonc_string` with // and /* */ comments removed.
@@ -43,65 +53,13 @@ def strip_comments(jsonc_string: str) -> str:
     This simple implementation preserves line breaks for most single-line
     comments and strips block comments using a non-greedy DOTALL regex.
     """
-    # Robust scanner: iterate characters and remove comments while respecting
-    # double-quoted strings and escapes. Preserves newline for single-line
-    # comments so line count remains stable for diagnostics.
-    out = []
-    i = 0
-    n = len(jsonc_string)
-    in_string = False
-
-    while i < n:
-        ch = jsonc_string[i]
-
-        if in_string:
-            out.append(ch)
-            if ch == '\\':
-                # preserve escape and next char if present
-                if i + 1 < n:
-                    out.append(jsonc_string[i + 1])
-                    i += 1
-            elif ch == '"':
-                in_string = False
-            i += 1
-            continue
-
-        # not in a string
-        if ch == '"':
-            in_string = True
-            out.append(ch)
-            i += 1
-            continue
-
-        # possible comment
-        if ch == '/' and i + 1 < n:
-            nxt = jsonc_string[i + 1]
-            if nxt == '/':
-                # single-line comment: skip until end of line, preserve newline
-                i += 2
-                while i < n and jsonc_string[i] != '\n':
-                    i += 1
-                if i < n and jsonc_string[i] == '\n':
-                    out.append('\n')
-                    i += 1
-                continue
-            if nxt == '*':
-                # block comment: skip until closing '*/'
-                i += 2
-                while i + 1 < n and not (jsonc_string[i] == '*' and jsonc_string[i + 1] == '/'):
-                    i += 1
-                if i + 1 < n:
-                    i += 2
-                continue
-
-        # normal character
-        out.append(ch)
-        i += 1
-
-    res = ''.join(out)
-    # Remove any now-empty lines that came from full-line comments so there are no blank lines in the output.
-    no_blank_lines = re.sub(r'(?m)^[ \t]*\n+', '', res)
-    return no_blank_lines.strip()
+    if '/' not in jsonc_string:
+        # fast path: without a '/' there are no comments to remove
+        return re.sub(r'(?m)^[ \t]*\n+', '', jsonc_string).strip()
+
+    # Double-quoted strings are captured (and kept via \1); comments and
+    # lines left empty by them match outside the group and are dropped.
+    return JSONC_COMMENT_RE.sub(r'\1', jsonc_string).strip()
 
 
 def main(argv: List[str] | None = None) -> int:
@@ -35,6 +35,7 @@ import os
 import re
 import json
 import argparse
+import functools
 from typing import Any
 
 
@@ -46,365 +47,291 @@ try:
 except Exception:
     JSON_FLAVOR = "JSONC"
 
-
-def extract_preamble_postamble(text):
+# without json5, objects are strict JSON, which orjson decodes faster when installed
+_json_loads = json.loads
+try:
+    import orjson as _orjson  # type: ignore
+    _json_loads = _orjson.loads
+except Exception:
+    pass
+
+
+# stdin is split undecoded; UTF-8 never reuses the ASCII bytes split_document() looks for.
+LBRACE, RBRACE, LBRACKET, RBRACKET, COMMA = b'{}[],'
+
+# The scanners all lex with the same pattern for the parts that cannot change their state:
+# strings, comments, and a lone '/'. A line comment includes its newline; unterminated strings
+# and block comments run to the end.
+SKIPPABLE_PATTERN = (
+    rb'"[^"\\]*(?:\\.[^"\\]*)*"?'
+    rb"|'[^'\\]*(?:\\.[^'\\]*)*'?"
+    rb'|//[^\n]*\n?'
+    rb'|/\*.*?(?:\*/|\Z)'
+    rb'|/'
+)
+
+# split_document() walks the preamble's tokens until a bracket outside them is captured.
+ARRAY_TOKEN_RE = re.compile(SKIPPABLE_PATTERN + rb'|([\[\]])', re.DOTALL)
+
+# Inside the array, split_document() lets the regex engine consume everything up to the next
+# brace or bracket in C, so Python only sees those. Each match is capped at 256 runs, strings
+# and comments, because the engine keeps backtracking state for every one it repeats over; a
+# match that stops short of a brace or bracket is simply continued.
+OBJECT_START_SKIP_RE = re.compile(rb'(?:[^"\'/{\[\]]+|' + SKIPPABLE_PATTERN + rb'){0,256}', re.DOTALL)
+OBJECT_SKIP_RE = re.compile(rb'(?:[^"\'/{}\[\]]+|' + SKIPPABLE_PATTERN + rb'){0,256}', re.DOTALL)
+# The trivia around a separating comma: whitespace in the str.isspace() sense (ASCII, then the
+# UTF-8 encodings of the non-ASCII space characters) and comments, capped the same way.
+WS_COMMENTS_RE = re.compile(
+    rb'(?:[\t\n\x0b\x0c\r\x1c-\x1f ]+'
+    rb'|\xc2[\x85\xa0]|\xe1\x9a\x80|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]|\xe2\x81\x9f|\xe3\x80\x80'
+    rb'|//[^\n]*\n?|/\*.*?(?:\*/|\Z)){0,256}', re.DOTALL)
+# The bytes that can begin that trivia; a match only stops on one of them at its run limit.
+WS_COMMENTS_START = b'\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f /\xc2\xe1\xe2\xe3'
+
+# Cleans an object's text for json.loads in one pass. The text is tokenized into comments and
+# trailing commas (dropped), and double-quoted strings, runs of other text, or a lone '"', '/'
+# or ',' (kept, group 1); joining what findall() returns for group 1 rebuilds the text without
+# the dropped tokens, entirely in C. A comma is trailing when only whitespace and comments
+# separate it from the next '}' or ']'. Strings are matched unrolled, a run of plain characters
+# at a time rather than one alternation per character, and the lookahead's comment patterns
+# cannot backtrack into a comment body.
+JSONC_CLEAN_RE = re.compile(
+    rb'//[^\n]*'
+    rb'|/\*.*?\*/'
+    rb'|,(?=(?:\s|//[^\n]*(?:\n|\Z)|/\*[^*]*\*+(?:[^/*][^*]*\*+)*/)*[}\]])'
+    rb'|("[^"\\]*(?:\\.[^"\\]*)*"|[^"/,]+|["/,])', re.DOTALL)
+
+# parse_object_text() only cleans objects that have a '/' or a match for this.
+TRAILING_COMMA_RE = re.compile(rb',\s*[}\]]')
+
+
+def split_document(text: bytes):
     """
-    Find the top-level JSON array brackets, skipping any brackets that appear
-    inside comments or strings in the preamble/postamble.
+    Split the text into (preamble, units, postamble) in one pass. The array is the first '['
+    outside comments and strings through its matching ']'. Each unit is a
+    (lead_start, obj_start, obj_end, comma, end) tuple of offsets into the text: the comments
+    and whitespace before an object start at lead_start, the object is text[obj_start:obj_end],
+    and the trivia around its separating comma runs to end. comma is the offset of that comma,
+    or -1 without one.
+
+    Without a complete array, the whole text is returned as the postamble with no units.
     """
 
-    i = 0
-    n = len(text)
-    in_string = False
-    string_char = ''
-    esc = False
-    in_line_comment = False
-    in_block_comment = False
     start = -1
-
-    while i < n:
-        ch = text[i]
-        next2 = text[i:i + 2] if i + 2 <= n else ''
-
-        if in_line_comment:
-            if ch == '\n':
-                in_line_comment = False
-            i += 1
-            continue
-        if in_block_comment:
-            if next2 == '*/':
-                in_block_comment = False
-                i += 2
-            else:
-                i += 1
-            continue
-        if in_string:
-            if esc:
-                esc = False
-            elif ch == '\\':
-                esc = True
-            elif ch == string_char:
-                in_string = False
-            i += 1
-            continue
-
-        if next2 == '//':
-            in_line_comment = True
-            i += 2
-            continue
-        if next2 == '/*':
-            in_block_comment = True
-            i += 2
-            continue
-        if ch == '"' or ch == "'":
-            in_string = True
-            string_char = ch
-            i += 1
-            continue
-        if ch == '[':
-            start = i
+    for m in ARRAY_TOKEN_RE.finditer(text):
+        if m.group(1) == b'[':
+            start = m.start()
             break
-        i += 1
-
     if start == -1:
-        return '', '', text
-
-    depth = 1
-    i = start + 1
-    in_string = False
-    string_char = ''
-    esc = False
-    in_line_comment = False
-    in_block_comment = False
-    end = -1
-
-    while i < n:
-        ch = text[i]
-        next2 = text[i:i + 2] if i + 2 <= n else ''
-
-        if in_line_comment:
-            if ch == '\n':
-                in_line_comment = False
-            i += 1
-            continue
-        if in_block_comment:
-            if next2 == '*/':
-                in_block_comment = False
-                i += 2
-            else:
-                i += 1
-            continue
-        if in_string:
-            if esc:
-                esc = False
-            elif ch == '\\':
-                esc = True
-            elif ch == string_char:
-                in_string = False
-            i += 1
-            continue
-
-        if next2 == '//':
-            in_line_comment = True
-            i += 2
-            continue
-        if next2 == '/*':
-            in_block_comment = True
-            i += 2
-            continue
-        if ch == '"' or ch == "'":
-            in_string = True
-            string_char = ch
-            i += 1
-            continue
-        if ch == '[':
-            depth += 1
-        elif ch == ']':
-            depth -= 1
-            if depth == 0:
-                end = i
-                break
-        i += 1
-
-    if end == -1:
-        return '', '', text
+        return b'', [], text
 
-    preamble = text[:start]
-    postamble = text[end + 1:]
-    array_text = text[start + 1:end]  # exclude [ and ]
-    return preamble, array_text, postamble
-
-
-def split_units(array_text: str):
     units = []
-    n = len(array_text)
-    i = 0
-
-    def consume_ws_comments(pos: int) -> int:
-        while pos < n:
-            if array_text[pos].isspace():
-                pos += 1
-                continue
-            if array_text.startswith('//', pos):
-                nl = array_text.find('\n', pos)
-                if nl == -1:
-                    return n
-                pos = nl + 1
-                continue
-            if array_text.startswith('/*', pos):
-                end = array_text.find('*/', pos + 2)
-                if end == -1:
-                    return n
-                pos = end + 2
-                continue
-            break
-        return pos
+    n = len(text)
+    i = start + 1
+    depth = 1  # bracket depth, including brackets inside objects
+    skip_to_object = OBJECT_START_SKIP_RE.match
+    skip_to_brace = OBJECT_SKIP_RE.match
+    skip_ws_comments = WS_COMMENTS_RE.match
 
-    while i < n:
+    while True:
         lead_start = i
 
-        in_string = False
-        string_char = ''
-        esc = False
-        in_line_comment = False
-        in_block_comment = False
-        obj_start = -1
-        while i < n:
-            ch = array_text[i]
-            next2 = array_text[i:i + 2] if i + 2 <= n else ''
-
-            if in_line_comment:
-                if ch == '\n':
-                    in_line_comment = False
-                i += 1
-                continue
-            if in_block_comment:
-                if next2 == '*/':
-                    in_block_comment = False
-                    i += 2
-                else:
-                    i += 1
-                continue
-            if in_string:
-                if esc:
-                    esc = False
-                elif ch == '\\':
-                    esc = True
-                elif ch == string_char:
-                    in_string = False
-                i += 1
-                continue
-
-            if next2 == '//':
-                in_line_comment = True
-                i += 2
-                continue
-            if next2 == '/*':
-                in_block_comment = True
-                i += 2
-                continue
-            if ch == '"' or ch == "'":
-                in_string = True
-                string_char = ch
-                i += 1
-                continue
-            if ch == '{':
-                obj_start = i
+        # find the next '{' outside of strings and comments, or the end of the array
+        while True:
+            i = skip_to_object(text, i).end()
+            if i >= n:
+                return b'', [], text
+            ch = text[i]
+            if ch == LBRACE:
                 break
+            if ch == LBRACKET:
+                depth += 1
+            elif ch == RBRACKET:
+                depth -= 1
+                if depth == 0:
+                    return text[:start], units, text[i + 1:]
+            else:
+                # the skip stopped at its run limit
+                continue
             i += 1
+        obj_start = i
 
-        if obj_start == -1:
-            break
-
-        leading = array_text[lead_start:obj_start]
-
-        depth = 1
+        # find its matching '}'; an object still open at the end of the array is dropped
+        braces = 1
         i = obj_start + 1
-        in_string = False
-        string_char = ''
-        esc = False
-        in_line_comment = False
-        in_block_comment = False
-        obj_end = -1
-        while i < n:
-            ch = array_text[i]
-            next2 = array_text[i:i + 2] if i + 2 <= n else ''
-
-            if in_line_comment:
-                if ch == '\n':
-                    in_line_comment = False
-                i += 1
-                continue
-            if in_block_comment:
-                if next2 == '*/':
-                    in_block_comment = False
-                    i += 2
-                else:
-                    i += 1
-                continue
-            if in_string:
-                if esc:
-                    esc = False
-                elif ch == '\\':
-                    esc = True
-                elif ch == string_char:
-                    in_string = False
-                i += 1
-                continue
-
-            if next2 == '//':
-                in_line_comment = True
-                i += 2
-                continue
-            if next2 == '/*':
-                in_block_comment = True
-                i += 2
-                continue
-            if ch == '"' or ch == "'":
-                in_string = True
-                string_char = ch
-                i += 1
-                continue
-
-            if ch == '{':
+        while True:
+            i = skip_to_brace(text, i).end()
+            if i >= n:
+                return b'', [], text
+            ch = text[i]
+            if ch == LBRACE:
+                braces += 1
+            elif ch == RBRACE:
+                braces -= 1
+                if braces == 0:
+                    break
+            elif ch == LBRACKET:
                 depth += 1
-            elif ch == '}':
+            elif ch == RBRACKET:
                 depth -= 1
                 if depth == 0:
-                    obj_end = i
-                    i += 1
-                    break
+                    return text[:start], units, text[i + 1:]
+            else:
+                # the skip stopped at its run limit
+                continue
             i += 1
 
-        if obj_end == -1:
-            break
-
-        obj_text = array_text[obj_start:obj_end + 1]
-
-        trivia_before_start = i
-        i = consume_ws_comments(i)
-        trivia_before = array_text[trivia_before_start:i]
+        obj_end = i + 1
 
-        if i < n and array_text[i] == ',':
-            i += 1
-
-        trivia_after_start = i
-        i = consume_ws_comments(i)
-        trivia_after = array_text[trivia_after_start:i]
+        comma = -1
+        i = skip_ws_comments(text, obj_end).end()
+        while i < n and text[i] in WS_COMMENTS_START:
+            j = skip_ws_comments(text, i).end()
+            if j == i:
+                break
+            i = j
+        if i < n and text[i] == COMMA:
+            comma = i
+            i = skip_ws_comments(text, i + 1).end()
+            while i < n and text[i] in WS_COMMENTS_START:
+                j = skip_ws_comments(text, i).end()
+                if j == i:
+                    break
+                i = j
 
-        trailing = trivia_before + trivia_after
+        units.append((lead_start, obj_start, obj_end, comma, i))
 
-        units.append((leading, obj_text, trailing))
 
-    return units
+def _append_unit(out: list, text: memoryview, unit: tuple, separator: bytes) -> None:
+    """Append a unit's text to out, with `separator` right after the object in place of its comma."""
 
+    lead_start, obj_start, obj_end, comma, end = unit
+    if comma == -1:
+        out += (text[lead_start:obj_end], separator, text[obj_end:end])
+    else:
+        out += (text[lead_start:obj_end], separator, text[obj_end:comma], text[comma + 1:end])
 
-def strip_json_comments(text):
-    def replacer(match):
-        s = match.group(0)
-        if s.startswith('/'):
-            return ''
-        return s
-    pattern = r'("(?:\\.|[^"\\])*"|//.*?$|/\*.*?\*/)'  # string or comment
-    return re.sub(pattern, replacer, text, flags=re.DOTALL | re.MULTILINE)
 
+def clean_object_text(text: bytes) -> bytes:
+    """Remove // and /* */ comments and trailing commas, leaving double-quoted strings intact."""
 
-def strip_trailing_commas(text):
-    text = re.sub(r',\s*([}\]])', r'\1', text)
-    return text
+    # dropped tokens contribute an empty group 1; unlike sub() with a r'\1' template,
+    # this never calls back into Python per match
+    return b''.join(JSONC_CLEAN_RE.findall(text))
 
 
-def parse_object_text(obj_str: str) -> dict[str, Any]:
+def parse_object_text(obj_str: bytes) -> dict[str, Any]:
     parsed: Any
     if _json5 is not None:
-        parsed = _json5.loads(obj_str)
+        parsed = _json5.loads(obj_str.decode('utf-8'))
     else:
-        clean = strip_json_comments(obj_str)
-        clean = strip_trailing_commas(clean)
-        parsed = json.loads(clean)
+        if b'/' in obj_str or TRAILING_COMMA_RE.search(obj_str):
+            obj_str = clean_object_text(obj_str)
+        # json.loads and orjson.loads both accept the UTF-8 bytes directly
+        try:
+            parsed = _json_loads(obj_str)
+        except Exception:
+            # e.g. NaN or a 65-bit integer, which only json.loads accepts
+            parsed = json.loads(obj_str)
 
     if not isinstance(parsed, dict):
         raise ValueError("object text did not parse to a JSON object")
     return parsed
 
 
-def should_remove(obj_text, attr, val, unit_text=None):
-    if attr in ('any', '*'):
-        haystack = unit_text if unit_text is not None else obj_text
-        return val in haystack
+@functools.lru_cache(maxsize=4096)
+def _parse_object_cached(obj_str: bytes) -> dict[str, Any]:
+    """
+    parse_object_text(), cached by text so identical objects are only parsed once.
+    The returned dict is shared between calls and must not be modified.
+    Failures raise and are not cached.
+    """
 
-    start = obj_text.find('{')
-    end = obj_text.rfind('}')
-    if start == -1 or end == -1 or end < start:
-        return False
-    obj_str = obj_text[start:end + 1]
-    try:
-        obj = parse_object_text(obj_str)
+    return parse_object_text(obj_str)
+
+
+def _make_any_matcher(val: str):
+    # UTF-8 is self-synchronizing, so a substring test on the encoded text
+    # gives the same answer as one on the decoded text
+    needle = val.encode('utf-8', 'surrogateescape')
+
+    def matches(text: bytes, lead_start: int, obj_start: int, obj_end: int) -> bool:
+        return text.find(needle, lead_start, obj_end) != -1
+
+    return matches
+
+
+def _make_attr_matcher(attr: str, val: str):
+    needle = val.encode('utf-8', 'surrogateescape')
+    # in strict JSON the quoted attribute name must appear too; b'' is in every text
+    quoted_attr = f'"{attr}"'.encode('utf-8', 'surrogateescape') if _json5 is None and val else b''
+    # the attribute's string value, read straight from text without escapes
+    attr_value_search = re.compile(re.escape(quoted_attr) + rb'\s*:\s*"([^"]*)"').search if quoted_attr else None
+
+    def matches(text: bytes, lead_start: int, obj_start: int, obj_end: int) -> bool:
+        # cheap prefilters before parsing, run in place on the input: without escapes, the quoted
+        # attribute name must appear literally in the text
+        if text.find(b'\\', obj_start, obj_end) == -1:
+            if text.find(quoted_attr, obj_start, obj_end) == -1:
+                return False
+            # when the name appears only once, that is the only place the attribute can be; if its
+            # value is a string lacking `val`, the object cannot match whether or not it parses.
+            # Other values are matched by their str() form, which the text need not contain.
+            if attr_value_search is not None and text.count(quoted_attr, obj_start, obj_end) == 1:
+                m = attr_value_search(text, obj_start, obj_end)
+                if m is not None and needle not in m.group(1):
+                    return False
+
+        obj_str = text[obj_start:obj_end]
+        try:
+            obj = _parse_object_cached(obj_str)
+        except Exception:
+            return False
+        return val in str(obj.get(attr, ''))
+
+    return matches
+
+
+def _make_attr_matcher_debug(attr: str, val: str):
+    # no prefilters, so every object is parsed and logged
+    def matches(text: bytes, lead_start: int, obj_start: int, obj_end: int) -> bool:
+        obj_str = text[obj_start:obj_end]
+        try:
+            obj = _parse_object_cached(obj_str)
+        except Exception:
+            print(f"DEBUG: failed to parse object text: {obj_str.decode('utf-8', 'replace')}", file=sys.stderr)
+            return False
 
         attr_val = obj.get(attr, '')
         contains = val in str(attr_val)
-
-        # debug output to stderr when KEYBINDINGS_REMOVE_DEBUG env var set
-        if os.environ.get('KEYBINDINGS_REMOVE_DEBUG'):
-            print('DEBUG: obj=', obj, file=sys.stderr)
-            print(f"DEBUG: attr={attr!r} attr_val={attr_val!r} contains={contains}", file=sys.stderr)
+        print('DEBUG: obj=', obj, file=sys.stderr)
+        print(f"DEBUG: attr={attr!r} attr_val={attr_val!r} contains={contains}", file=sys.stderr)
         return contains
-    except Exception:
-        # debug info when parsing fails
-        if os.environ.get('KEYBINDINGS_REMOVE_DEBUG'):
-            print(f"DEBUG: failed to parse object text: {obj_str}", file=sys.stderr)
-        return False
+
+    return matches
+
+
+# built on first use and reused by later main() calls in the same process
+_PARSER = None
+
+
+def _get_parser() -> argparse.ArgumentParser:
+    global _PARSER
+    if _PARSER is None:
+        parser = argparse.ArgumentParser(
+            description="Remove objects from a JSONC keybindings.json array by attribute match.",
+            epilog="Example: %(prog)s command example < keybindings.json > keybindings-noexample.json",
+        )
+        parser.add_argument('attribute', help="An attribute name to match (e.g., 'command'), or use 'any' to match the search string anywhere inside the object.")
+        parser.epilog = "Use attribute name 'any' or '*' to match the search string anywhere inside the object (attributes, values, or comments)."
+        parser.add_argument('search_string', help='Substring to search for in the attribute value')
+        _PARSER = parser
+    return _PARSER
 
 
 def main(argv: list | None = None) -> int:
     argv = argv if argv is not None else sys.argv[1:]
-    parser = argparse.ArgumentParser(
-        description="Remove objects from a JSONC keybindings.json array by attribute match.",
-        epilog="Example: %(prog)s command example < keybindings.json > keybindings-noexample.json",
-    )
-    parser.add_argument('attribute', help="An attribute name to match (e.g., 'command'), or use 'any' to match the search string anywhere inside the object.")
-    parser.epilog = "Use attribute name 'any' or '*' to match the search string anywhere inside the object (attributes, values, or comments)."
-    parser.add_argument('search_string', help='Substring to search for in the attribute value')
+    parser = _get_parser()
 
     if not argv:
         parser.print_help()
@@ -412,29 +339,53 @@ def main(argv: list | None = None) -> int:
 
     args = parser.parse_args(argv)
     attr, val = args.attribute, args.search_string
-    raw = sys.stdin.read()
-    preamble, array_text, postamble = extract_preamble_postamble(raw)
-    units = split_units(array_text)
-
-    sys.stdout.write(preamble)
-    sys.stdout.write('[')
-    kept_units = []
-    for comments, obj, trailing in units:
-        unit_text = comments + obj
-        if should_remove(obj, attr, val, unit_text=unit_text):
+    raw = sys.stdin.buffer.read()
+    preamble, units, postamble = split_document(raw)
+
+    match_any = attr in ('any', '*')
+    # `any` matches raw text, so if the search string appears nowhere in the input, every unit
+    # is kept without looking at it; attribute values are matched by their str() form instead
+    check = not match_any or val.encode('utf-8', 'surrogateescape') in raw
+
+    # choose the matcher once; each one is called with the unit's offsets into the input,
+    # and only `any` matching looks at the leading comments
+    if match_any:
+        matches = _make_any_matcher(val)
+    elif os.environ.get('KEYBINDINGS_REMOVE_DEBUG'):
+        matches = _make_attr_matcher_debug(attr, val)
+    else:
+        matches = _make_attr_matcher(attr, val)
+
+    # decide and emit in one pass, collecting views of the input so kept text is never copied
+    # before the write; a kept unit is held back until the next kept unit shows it needs a
+    # separating comma. A held unit whose comma directly follows the object needs no changes,
+    # so it joins the run of input [copy_start:copy_end] that is written as one piece.
+    view = memoryview(raw)
+    out = [preamble, b'[']
+    held = None
+    copy_start = copy_end = 0
+    for unit in units:
+        if check and matches(raw, unit[0], unit[1], unit[2]):
             continue
-        kept_units.append((comments, obj, trailing))
-
-    for idx, (comments, obj, trailing) in enumerate(kept_units):
-        sys.stdout.write(comments)
-        sys.stdout.write(obj)
-        if idx < len(kept_units) - 1:
-            sys.stdout.write(',')
-        sys.stdout.write(trailing)
-    sys.stdout.write(']')
-    sys.stdout.write(postamble)
-    if not postamble.endswith('\n'):
-        sys.stdout.write('\n')
+        if held is not None:
+            if held[3] == held[2]:
+                if held[0] != copy_end:
+                    out.append(view[copy_start:copy_end])
+                    copy_start = held[0]
+                copy_end = held[4]
+            else:
+                out.append(view[copy_start:copy_end])
+                copy_start = copy_end = 0
+                _append_unit(out, view, held, b',')
+        held = unit
+    out.append(view[copy_start:copy_end])
+    if held is not None:
+        _append_unit(out, view, held, b'')
+    out.append(b']')
+    out.append(postamble)
+    if not postamble.endswith(b'\n'):
+        out.append(b'\n')
+    sys.stdout.buffer.writelines(out)
 
     return 0
 
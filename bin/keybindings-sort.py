@@ -48,6 +48,7 @@ Important notes
 
 - Requires Python 3.10 or newer (uses modern typing syntax).
 - Canonicalization is the primary CPU hotspot; memoization significantly reduces repeated work for identical `when` strings.
+- Uses `orjson` to parse objects when it is installed, otherwise the standard `json` module.
 
 Exit codes
 
@@ -64,15 +65,20 @@ import json
 import argparse
 from typing import List, Tuple
 
+# prefer a native JSON decoder for the cleaned object text, when installed
+_json_loads = json.loads
+try:
+    import orjson as _orjson  # type: ignore
+    _json_loads = _orjson.loads
+except Exception:
+    pass
+
 # global memoization cache for canonicalized when results
 CACHE_CANONICALIZE_WHEN: dict = {}
 
 # global memoization object cache for parsed JSON objects (key: raw object string including braces)
 CACHE_JSON_OBJECT: dict = {}
 
-# global memoization cache for sortable when keys (key: when string, value: sortable key)
-CACHE_SORTABLE_WHEN: dict = {}
-
 # global memoization cache for when specificity (key: when string, value: specificity tuple)
 CACHE_WHEN_SPECIFICITY: dict = {}
 
@@ -82,6 +88,12 @@ CACHE_NATURAL_KEY: dict = {}
 # global memoization cache for case-sensitive natural keys (key: string, value: list of string and int parts)
 CACHE_NATURAL_KEY_CS: dict = {}
 
+# global memoization cache for normalized keys (key: raw key string, value: normalize_key_for_compare() result)
+CACHE_NORMALIZED_KEY: dict = {}
+
+# global memoization cache for when prefix ranks (key: when prefixes tuple, value: when_prefix_ranks() result)
+CACHE_WHEN_PREFIX_RANKS: dict = {}
+
 # color default output value, options: 'auto'|'always'|'never'
 COLOR: str = 'auto'
 
@@ -152,6 +164,16 @@ FOCUS_TOKENS_MAP = {t: i for i, t in enumerate(FOCUS_TOKENS)}
 POSITIONAL_TOKENS_MAP = {t: i for i, t in enumerate(POSITIONAL_TOKENS)}
 VISIBILITY_TOKENS_MAP = {t: i for i, t in enumerate(VISIBILITY_TOKENS)}
 
+# precomputed token matchers for grouping; an entry ending in '.' is a prefix, an entry with
+# '<viewId>' matches any view id in its place, and anything else must match exactly
+POSITIONAL_TOKENS_PREFIXES = tuple(POSITIONAL_TOKENS)
+FOCUS_TOKENS_EXACT = frozenset(t for t in FOCUS_TOKENS if not t.endswith('.') and '<viewId>' not in t)
+FOCUS_TOKENS_PREFIXES = tuple(t for t in FOCUS_TOKENS if t.endswith('.'))
+FOCUS_TOKENS_VIEW_IDS = tuple(tuple(t.split('<viewId>', 1)) for t in FOCUS_TOKENS if not t.endswith('.') and '<viewId>' in t)
+VISIBILITY_TOKENS_EXACT = frozenset(t for t in VISIBILITY_TOKENS if not t.endswith('.') and '<viewId>' not in t)
+VISIBILITY_TOKENS_PREFIXES = tuple(t for t in VISIBILITY_TOKENS if t.endswith('.'))
+VISIBILITY_TOKENS_VIEW_IDS = tuple(tuple(t.split('<viewId>', 1)) for t in VISIBILITY_TOKENS if not t.endswith('.') and '<viewId>' in t)
+
 # profile defaults for `--when-grouping` values; arg values always override these
 WHEN_GROUPING_PROFILES = {
     'focal-invariant': {
@@ -170,36 +192,72 @@ WHEN_GROUPING_PROFILES = {
 }
 
 # precompiled regexes for performance
-COMMENT_RE = re.compile(r'("(?:\\.|[^"\\])*"|//.*?$|/\*.*?\*/)', re.DOTALL | re.MULTILINE)
+# strip_json_comments() keeps group 1 (runs of text and complete strings) and drops the comments
+COMMENT_RE = re.compile(r'((?:[^"/]+|"[^"\\]*(?:\\.[^"\\]*)*"|/(?![/*]))+)|//[^\n]*|/\*.*?\*/', re.DOTALL)
 TRAILING_COMMA_RE = re.compile(r',\s*([}\]])')
 NUMBER_SPLIT_RE = re.compile(r'(\d+)')
+DIGITS_RE = re.compile(r'\d+')
 WHEN_TERM_SPLIT_RE = re.compile(r'\s*&&\s*|\s*\|\|\s*')
-OBJ_RE = re.compile(r'\{.*\}', re.DOTALL)
-WHEN_LITERAL_RE = re.compile(r'("when"\s*:\s*\")((?:\\.|[^"\\])*)(\")')
-KEY_EXTRACT_RE = re.compile(r'"key"\s*:\s*"((?:\\.|[^"\\])*)"')
-WHEN_EXTRACT_RE = re.compile(r'"when"\s*:\s*"((?:\\.|[^"\\])*)"')
-WHITESPACE_RE = re.compile(r'\s+')
+WHEN_LITERAL_RE = re.compile(r'("when"\s*:\s*\")([^"\\]*(?:\\.[^"\\]*)*)(\")')
+KEY_EXTRACT_RE = re.compile(r'"key"\s*:\s*"([^"\\]*(?:\\.[^"\\]*)*)"')
+WHEN_EXTRACT_RE = re.compile(r'"when"\s*:\s*"([^"\\]*(?:\\.[^"\\]*)*)"')
+# a double-quoted string from its opening quote, honoring backslash escapes
+STRING_LITERAL_RE = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
 WHEN_SORTED_RE = re.compile(r'^\s*//\s*when-sorted:.*\n', re.MULTILINE)
 BLANK_LINES_RE = re.compile(r'(?m)^[ \t]*\n+')
 LEADING_COMMA_RE = re.compile(r'^\s*,+')
 STRIP_WS_RE = re.compile(r'^[ \t\r\n]+|[ \t\r\n]+$')
 LEADING_NEWLINES_RE = re.compile(r'^\n+')
+# tokenize_when() consumes operand text, quoted strings and regex literals a run at a time
+WHEN_PLAIN_RE = re.compile(r'[^\'"/&|()!]+')
+WHEN_QUOTED_RE = re.compile(r'\'(?:[^\'\\]+|\\[\s\S]?)*\'?|"(?:[^"\\]+|\\[\s\S]?)*"?')
+WHEN_REGEX_LITERAL_RE = re.compile(r'/(?:[^/\\]+|\\[\s\S]?)*/?')
+
+# extract_preamble_postamble() lets the regex engine skip everything up to the next bracket in C,
+# so Python only sees brackets. Before the array only comments are skipped; inside it, strings
+# are too. Each match is capped at 256 runs, strings and comments, so the engine's backtracking
+# state stays small on large files; a match that stops short of a bracket is simply continued.
+PREAMBLE_SKIP_RE = re.compile(r'(?:[^/\[]+|//[^\n]*\n?|/\*.*?(?:\*/|\Z)|/){0,256}', re.DOTALL)
+ARRAY_SKIP_RE = re.compile(
+    r'(?:[^"\'/\[\]]+'
+    r'|"[^"\\]*(?:\\.[^"\\]*)*"?'
+    r"|'[^'\\]*(?:\\.[^'\\]*)*'?"
+    r'|//[^\n]*\n?|/\*.*?(?:\*/|\Z)|/){0,256}', re.DOTALL)
+# the same skip for group_objects_with_comments(), stopping at braces instead of brackets
+OBJECT_SKIP_RE = re.compile(
+    r'(?:[^"\'/{}]+'
+    r'|"[^"\\]*(?:\\.[^"\\]*)*"?'
+    r"|'[^'\\]*(?:\\.[^'\\]*)*'?"
+    r'|//[^\n]*\n?|/\*.*?(?:\*/|\Z)|/){0,256}', re.DOTALL)
 
 
 class WhenNode:
+    __slots__ = ('parens', '_cached')
+
     def __init__(self, parens: bool = False):
         self.parens = parens
+        self._cached = None
 
     def to_str(self) -> str:
+        # cached because sorting renders the same operand many times; anything that changes
+        # children (or a child's parens) must reset _cached
+        cached = self._cached
+        if cached is None:
+            cached = self._cached = self._render()
+        return cached
+
+    def _render(self) -> str:
         raise NotImplementedError
 
 
 class WhenAnd(WhenNode):
+    __slots__ = ('children',)
+
     def __init__(self, children, parens: bool = False):
         super().__init__(parens=parens)
         self.children = children
 
-    def to_str(self) -> str:
+    def _render(self) -> str:
         parts: list[str] = []
         for c in self.children:
             s = render_when_node(c)
@@ -211,6 +269,8 @@ class WhenAnd(WhenNode):
 
 
 class WhenLeaf(WhenNode):
+    __slots__ = ('text',)
+
     def __init__(self, text: str, parens: bool = False):
         super().__init__(parens=parens)
         self.text = text
@@ -220,11 +280,13 @@ class WhenLeaf(WhenNode):
 
 
 class WhenNot(WhenNode):
+    __slots__ = ('child',)
+
     def __init__(self, child: WhenNode, parens: bool = False):
         super().__init__(parens=parens)
         self.child = child
 
-    def to_str(self) -> str:
+    def _render(self) -> str:
         child_str = self.child.to_str()
         if isinstance(self.child, (WhenAnd, WhenOr)) and not self.child.parens:
             child_str = f'({child_str})'
@@ -232,11 +294,13 @@ class WhenNot(WhenNode):
 
 
 class WhenOr(WhenNode):
+    __slots__ = ('children',)
+
     def __init__(self, children, parens: bool = False):
         super().__init__(parens=parens)
         self.children = children
 
-    def to_str(self) -> str:
+    def _render(self) -> str:
         parts: list[str] = []
         for c in self.children:
             s = render_when_node(c)
@@ -264,7 +328,7 @@ def _apply_debug_settings(debug_specs: list[str] | None, color: str) -> None:
             spec = '1'
         spec = str(spec).strip()
 
-        if re.fullmatch(r'\d+', spec):
+        if DIGITS_RE.fullmatch(spec):
             max_level = max(max_level, int(spec))
             continue
 
@@ -276,7 +340,7 @@ def _apply_debug_settings(debug_specs: list[str] | None, color: str) -> None:
                 DEBUG_TARGET_WHEN = value
             elif key in ('target', 'category'):
                 DEBUG_TARGET_CATEGORY = value
-            elif key == 'level' and re.fullmatch(r'\d+', value):
+            elif key == 'level' and DIGITS_RE.fullmatch(value):
                 max_level = max(max_level, int(value))
 
     if max_level == 0:
@@ -440,6 +504,9 @@ def _contains_focus_token_in_object(obj_text: str) -> bool:
 
 
 def _decode_json_string_literal(raw: str) -> str:
+    # ASCII without escapes decodes to itself either way
+    if '\\' not in raw and raw.isascii():
+        return raw
     try:
         return json.loads('"' + raw + '"')
     except Exception:
@@ -515,30 +582,11 @@ def _finalize_processed_output(
     return _remove_blank_lines(text)
 
 
-def _first_when_group_rank(
-    obj_text: str,
-    mode: str,
-    negation_mode: str,
-    when_prefixes: list | None = None,
-    when_regexes: list | None = None,
-) -> int:
-    when_key, when_val = extract_key_when(obj_text)
-    canonical = canonicalize_when(
-        when_val,
-        mode=mode,
-        negation_mode=negation_mode,
-        when_prefixes=when_prefixes,
-        when_regexes=when_regexes,
-    )
-
+def _first_when_group_rank(canonical: str, mode: str) -> int:
     if not canonical:
         return 5
 
-    parts = WHEN_TERM_SPLIT_RE.split(canonical.strip())
-    if not parts:
-        return 5
-
-    first = parts[0].strip()
+    first = _first_when_term(canonical)
     while first.startswith('(') and first.endswith(')'):
         first = first[1:-1].strip()
 
@@ -587,7 +635,8 @@ def _matches_when_entry(left: str, entry: str) -> bool:
 
 
 def _normalize_whitespace(text: str) -> str:
-    return WHITESPACE_RE.sub(' ', text).strip() if text else ''
+    # split() without arguments drops leading/trailing whitespace and splits on runs of it
+    return ' '.join(text.split()) if text else ''
 
 
 def _parse_when_prefixes(parser: argparse.ArgumentParser, raw_prefixes: str | None) -> list[str]:
@@ -725,8 +774,7 @@ def _replace_when_literals(
     when_prefixes: list | None = None,
     when_regexes: list | None = None,
 ) -> str:
-    return re.sub(
-        r'("when"\s*:\s*")((?:\\.|[^"\\])*)(")',
+    return WHEN_LITERAL_RE.sub(
         lambda match: _replace_when_literal_match(
             match,
             grouping_mode,
@@ -745,16 +793,15 @@ def _sort_groups_for_primary_when(
     when_prefixes: list | None = None,
     when_regexes: list | None = None,
 ) -> list[tuple[str, str]]:
-    decorated: list[tuple[str, str, tuple[str, str]]] = []
+    # one pass builds each row's composite sort key (canonical when, raw when, key)
+    decorated: list[tuple[tuple, str, tuple[str, str]]] = []
     for pair in sorted_groups:
         key_val, when_val = extract_key_when(pair[1])
         if not key_val:
             key_val = _extract_literal_key_from_object(pair[1])
         if not when_val:
             when_val = _extract_literal_when_from_object(pair[1])
-        decorated.append((key_val, when_val, pair))
 
-    for key_val, when_val, _pair in decorated:
         try:
             canonical = canonicalize_when(
                 when_val,
@@ -779,19 +826,9 @@ def _sort_groups_for_primary_when(
                 f"DEBUG_SORT: raw_key={key_val!r} normalized={normalized!r} natural_key={natural!r} when_raw={when_val!r} when_canonical={canonical!r}",
             )
 
-    decorated.sort(
-        key=lambda row: (
-            canonicalize_when(
-                row[1],
-                mode=grouping_mode,
-                negation_mode=negation_mode,
-                when_prefixes=when_prefixes,
-                when_regexes=when_regexes,
-            ),
-            row[1],
-            natural_key_case_sensitive(row[0]),
-        )
-    )
+        decorated.append(((canonical, when_val, natural_key_case_sensitive(key_val)), when_val, pair))
+
+    decorated.sort(key=lambda row: row[0])
 
     if grouping_mode == 'focal-invariant':
         non_focus_rows = []
@@ -824,37 +861,31 @@ def _sort_groups_for_primary_when(
 
     sorted_groups = [row[2] for row in decorated]
 
-    for idx, pair in enumerate(sorted_groups):
-        key_val, when_val = extract_key_when(pair[1])
-        try:
-            canonical = canonicalize_when(
-                when_val,
-                mode=grouping_mode,
-                negation_mode=negation_mode,
-                when_prefixes=when_prefixes,
-                when_regexes=when_regexes,
-            )
-        except Exception:
-            canonical = when_val
+    if DEBUG_LEVEL > 0:
+        for idx, pair in enumerate(sorted_groups):
+            key_val, when_val = extract_key_when(pair[1])
+            try:
+                canonical = canonicalize_when(
+                    when_val,
+                    mode=grouping_mode,
+                    negation_mode=negation_mode,
+                    when_prefixes=when_prefixes,
+                    when_regexes=when_regexes,
+                )
+            except Exception:
+                canonical = when_val
 
-        if DEBUG_LEVEL > 0:
             normalized = normalize_key_for_compare(key_val)
             debug_echo(1, 'ordered', canonical, f"DEBUG_ORDERED: idx={idx} raw_key={key_val!r} normalized={normalized!r}")
 
+    # runs of identical when clauses (whitespace-insensitive), from the whens extracted above
+    normalized_whens = [_normalize_whitespace(row[1]) for row in decorated]
+    n = len(sorted_groups)
     i = 0
-    while i < len(sorted_groups):
-        _, raw_when = extract_key_when(sorted_groups[i][1])
-        if not raw_when:
-            raw_when = _extract_literal_when_from_object(sorted_groups[i][1])
-
-        normalized_when = _normalize_whitespace(raw_when)
+    while i < n:
+        normalized_when = normalized_whens[i]
         j = i + 1
-        while j < len(sorted_groups):
-            _, next_when = extract_key_when(sorted_groups[j][1])
-            if not next_when:
-                next_when = _extract_literal_when_from_object(sorted_groups[j][1])
-            if _normalize_whitespace(next_when) != normalized_when:
-                break
+        while j < n and normalized_whens[j] == normalized_when:
             j += 1
 
         if j - i > 1 and negation_mode not in ('positive', 'negative'):
@@ -875,40 +906,37 @@ def _sort_groups_initial(
     negation_mode: str,
     when_prefixes: list | None = None,
     when_regexes: list | None = None,
-) -> list[tuple[str, str]]:
-    return sorted(
-        normalized_groups,
-        key=lambda pair: extract_sort_keys(
-            pair[1],
-            primary=primary_order,
-            secondary=secondary_order,
-            grouping=grouping_mode,
-            negation_mode=negation_mode,
-            when_prefixes=when_prefixes,
-            when_regexes=when_regexes,
-        ),
-    )
-
-
-def _sort_groups_with_grouping_mode(
-    sorted_groups: list[tuple[str, str]],
-    grouping_mode: str,
-    negation_mode: str,
-    when_prefixes: list | None = None,
-    when_regexes: list | None = None,
 ) -> list[tuple[str, str]]:
     if grouping_mode == 'none':
-        return sorted_groups
-
-    buckets: dict[int, list[tuple[str, str]]] = {}
-    for pair in sorted_groups:
-        rank = _first_when_group_rank(
-            pair[1],
+        sort_key = _build_sort_key(
+            primary_order,
+            secondary_order,
             grouping_mode,
             negation_mode,
             when_prefixes=when_prefixes,
             when_regexes=when_regexes,
         )
+        return sorted(normalized_groups, key=lambda pair: sort_key(pair[1]))
+
+    # the sort key already canonicalizes each when; take the grouping rank from it in the same pass
+    sort_key_and_when = _build_sort_key(
+        primary_order,
+        secondary_order,
+        grouping_mode,
+        negation_mode,
+        when_prefixes=when_prefixes,
+        when_regexes=when_regexes,
+        with_when=True,
+    )
+    decorated = []
+    for pair in normalized_groups:
+        key, canonical = sort_key_and_when(pair[1])
+        decorated.append((key, _first_when_group_rank(canonical, grouping_mode), pair))
+    decorated.sort(key=lambda row: row[0])
+
+    # stable buckets by descending rank, each keeping the sorted order
+    buckets: dict[int, list[tuple[str, str]]] = {}
+    for key, rank, pair in decorated:
         buckets.setdefault(rank, []).append(pair)
 
     final_groups: list[tuple[str, str]] = []
@@ -981,9 +1009,9 @@ def canonicalize_when(when_val: str, mode: str = 'config-first', negation_mode:
     ]
     """
 
-    focus_tokens = FOCUS_TOKENS
-    positional_tokens = POSITIONAL_TOKENS
-    visibility_tokens = VISIBILITY_TOKENS
+    # when prefixes in first-seen order, for prioritizing, and as a set for grouping
+    prefix_order = dict.fromkeys(when_prefixes) if when_prefixes else {}
+    prefix_set = frozenset(pref for pref in prefix_order if pref)
 
     def left_identifier(text: str) -> str:
         t = text.strip()
@@ -995,30 +1023,22 @@ def canonicalize_when(when_val: str, mode: str = 'config-first', negation_mode:
             return t
         return t.split()[0]
 
-    def _matches_entry(left: str, entry: str) -> bool:
-        if entry.endswith('.'):
-            return left.startswith(entry)
-        if '<viewId>' in entry:
-            prefix, suffix = entry.split('<viewId>', 1)
-            return left.startswith(prefix) and left.endswith(suffix)
-        return left == entry
-
     def _is_focus(left: str) -> bool:
-        return any(_matches_entry(left, entry) for entry in focus_tokens)
+        if left in FOCUS_TOKENS_EXACT or left.startswith(FOCUS_TOKENS_PREFIXES):
+            return True
+        return any(left.startswith(prefix) and left.endswith(suffix) for prefix, suffix in FOCUS_TOKENS_VIEW_IDS)
 
     def _is_visibility(left: str) -> bool:
-        return any(_matches_entry(left, entry) for entry in visibility_tokens)
+        if left in VISIBILITY_TOKENS_EXACT or left.startswith(VISIBILITY_TOKENS_PREFIXES):
+            return True
+        return any(left.startswith(prefix) and left.endswith(suffix) for prefix, suffix in VISIBILITY_TOKENS_VIEW_IDS)
 
     def group_rank(text: str) -> int:
         left = left_identifier(text)
 
-        if when_prefixes:
-            for pref in when_prefixes:
-                if not pref:
-                    continue
-                # literal exact-match against the left identifier
-                if left == pref:
-                    return 0
+        # literal exact-match against the left identifier
+        if left in prefix_set:
+            return 0
         if when_regexes:
             for pat in when_regexes:
                 try:
@@ -1040,7 +1060,7 @@ def canonicalize_when(when_val: str, mode: str = 'config-first', negation_mode:
         if mode == 'focal-invariant':
             if _is_focus(left):
                 return 1
-            if any(left.startswith(p) for p in positional_tokens):
+            if left.startswith(POSITIONAL_TOKENS_PREFIXES):
                 return 2
             if _is_visibility(left):
                 return 3
@@ -1050,7 +1070,7 @@ def canonicalize_when(when_val: str, mode: str = 'config-first', negation_mode:
         # config-first behavior
         if left.startswith('config.'):
             return 1
-        if any(left.startswith(p) for p in positional_tokens):
+        if left.startswith(POSITIONAL_TOKENS_PREFIXES):
             return 2
         if _is_focus(left):
             return 3
@@ -1077,36 +1097,63 @@ def canonicalize_when(when_val: str, mode: str = 'config-first', negation_mode:
 
         return (group_rank(token), natural_key_case_sensitive(order_token), idx)
 
+    # the AND operand sort key for the non-alpha negation modes, chosen once per call
+    if negation_mode == 'beta':
+        # alias: 'beta' points to positive-natural
+        nm = 'positive-natural'
+    else:
+        nm = negation_mode
+
+    if nm == 'natural':
+        # natural mode: ignore negation and sort by group then natural_key (case-insensitive)
+        def operand_key(grp, is_neg, f_rank, base, idx, tok):
+            return (grp, f_rank, natural_key(base), idx, tok)
+    elif nm in ('positive-natural', 'negative-natural'):
+        # positive-natural / negative-natural: existing "alpha/natural"-style
+        neg_first = nm == 'negative-natural'
+
+        def operand_key(grp, is_neg, f_rank, base, idx, tok):
+            return (grp, 0 if is_neg == neg_first else 1, f_rank, natural_key(base), idx, tok)
+    elif nm in ('positive', 'negative'):
+        # positive / negative: token-list ordering (focus/positional/visibility) as sub-rank, then case-sensitive base
+        neg_first = nm == 'negative'
+
+        def operand_key(grp, is_neg, f_rank, base, idx, tok):
+            return (grp, 0 if is_neg == neg_first else 1, f_rank, natural_key_case_sensitive(base), idx, tok)
+    else:
+        # default fallback
+        def operand_key(grp, is_neg, f_rank, base, idx, tok):
+            return (grp, 0, natural_key(base), idx, tok)
+
     def sort_and_nodes(node: WhenNode):
         if isinstance(node, WhenAnd):
             for child in node.children:
                 sort_and_nodes(child)
-            indexed = list(enumerate(node.children))
+            children = node.children
+            indexed = list(enumerate(children))
+
+            # render each operand and find its left identifier once, by position; everything
+            # below orders positions and looks tokens up here instead of rendering again
+            toks = [render_when_node(child) for child in children]
+            lids = [left_identifier(tok) for tok in toks]
 
-            # prioritize operands
+            # prioritize operands (by position)
             prioritized = []
             picked = set()
 
-            # get left identifier for an item
-            def _left_id_of(item_node):
-                tok = render_when_node(item_node)
-                lid = left_identifier(tok)
-                return lid
             if when_prefixes:
-                for pref in when_prefixes:
-                    matches = []
-                    for idx, child in indexed:
-                        if idx in picked:
-                            continue
-                        lid = _left_id_of(child)
-                        if lid == pref:
-                            matches.append((idx, child))
+                # bucket operands by prefix in one pass, then take the buckets in prefix order
+                buckets: dict = {}
+                for idx, child in indexed:
+                    if lids[idx] in prefix_order:
+                        buckets.setdefault(lids[idx], []).append((idx, child))
+                for pref in prefix_order:
+                    matches = buckets.get(pref)
                     if matches:
                         # alphabetical order for multiples
-                        matches.sort(key=lambda t: natural_key_case_sensitive(
-                            render_when_node(t[1])))
+                        matches.sort(key=lambda t: natural_key_case_sensitive(toks[t[0]]))
                         for m in matches:
-                            prioritized.append(m[1])
+                            prioritized.append(m[0])
                             picked.add(m[0])
             if when_regexes:
                 for pat in when_regexes:
@@ -1114,7 +1161,7 @@ def canonicalize_when(when_val: str, mode: str = 'config-first', negation_mode:
                     for idx, child in indexed:
                         if idx in picked:
                             continue
-                        lid = _left_id_of(child)
+                        lid = lids[idx]
                         try:
                             ok = pat.search(lid)
                         except Exception:
@@ -1125,26 +1172,19 @@ def canonicalize_when(when_val: str, mode: str = 'config-first', negation_mode:
                         if ok:
                             matches.append((idx, child))
                     if matches:
-                        matches.sort(key=lambda t: natural_key_case_sensitive(
-                            render_when_node(t[1])))
+                        matches.sort(key=lambda t: natural_key_case_sensitive(toks[t[0]]))
                         for m in matches:
-                            prioritized.append(m[1])
+                            prioritized.append(m[0])
                             picked.add(m[0])
 
-            if negation_mode == 'beta':
-                # alias: 'beta' points to positive-natural
-                nm = 'positive-natural'
-            else:
-                nm = negation_mode
-
             if negation_mode == 'alpha':
                 # use existing group-aware sort_key
                 indexed.sort(key=sort_key)
-                sorted_children = [it[1] for it in indexed]
+                order = [it[0] for it in indexed]
             else:
                 # for natural/positive/negative/beta: sort by rendered token base
-                def render_base_and_flag(child):
-                    tok = render_when_node(child)
+                items_with_keys = []
+                for idx, tok in enumerate(toks):
                     base = tok.strip()
                     # strip surrounding parentheses
                     while base.startswith('(') and base.endswith(')'):
@@ -1152,78 +1192,33 @@ def canonicalize_when(when_val: str, mode: str = 'config-first', negation_mode:
                     is_neg = base.startswith('!')
                     if is_neg:
                         base = base[1:].lstrip()
-                    return base, is_neg, tok
-
-                items_with_keys = []
-                for idx, child in indexed:
-                    base, is_neg, tok = render_base_and_flag(child)
-
-                    # natural-style comparison: use natural_key (case-insensitive)
-                    base_key = natural_key(base)
 
                     # always preserve grouping as the primary key so sorting does not move operands between buckets.
                     grp = group_rank(tok)
 
                     # compute a combined sub-rank if this token belongs to a known ordered identifier
-                    lid = _left_id_of(child)
+                    lid = lids[idx]
                     f_rank = FOCUS_TOKENS_MAP.get(lid, POSITIONAL_TOKENS_MAP.get(lid, VISIBILITY_TOKENS_MAP.get(lid, 9999)))
 
-                    # natural mode: ignore negation and sort by group then base_key
-                    if nm == 'natural':
-                        items_with_keys.append(
-                            (idx, child, (grp, f_rank, base_key, idx, tok)))
-                        continue
+                    items_with_keys.append((idx, operand_key(grp, is_neg, f_rank, base, idx, tok)))
 
-                    # positive-natural / negative-natural: existing "alpha/natural"-style
-                    if nm == 'positive-natural':
-                        neg_sort = 0 if not is_neg else 1
-                        items_with_keys.append((idx, child, (grp, neg_sort, f_rank, base_key, idx, tok)))
-                        continue
-
-                    if nm == 'negative-natural':
-                        neg_sort = 0 if is_neg else 1
-                        items_with_keys.append((idx, child, (grp, neg_sort, f_rank, base_key, idx, tok)))
-                        continue
-
-                    # positive / negative: preserve original list order within positive/negative groups
-                    if nm == 'positive':
-                        neg_sort = 0 if not is_neg else 1
-                        # use token-list ordering (focus/positional/visibility) as sub-rank
-                        f_rank = FOCUS_TOKENS_MAP.get(lid, POSITIONAL_TOKENS_MAP.get(lid, VISIBILITY_TOKENS_MAP.get(lid, 9999)))
-                        base_key_cs = natural_key_case_sensitive(base)
-                        items_with_keys.append((idx, child, (grp, neg_sort, f_rank, base_key_cs, idx, tok)))
-                        continue
-
-                    if nm == 'negative':
-                        neg_sort = 0 if is_neg else 1
-                        f_rank = FOCUS_TOKENS_MAP.get(lid, POSITIONAL_TOKENS_MAP.get(lid, VISIBILITY_TOKENS_MAP.get(lid, 9999)))
-                        base_key_cs = natural_key_case_sensitive(base)
-                        items_with_keys.append((idx, child, (grp, neg_sort, f_rank, base_key_cs, idx, tok)))
-                        continue
-
-                    # default fallback
-                    neg_sort = 0
-                    items_with_keys.append((idx, child, (grp, neg_sort, base_key, idx, tok)))
-
-                items_with_keys.sort(key=lambda t: t[2])
-                sorted_children = [it[1] for it in items_with_keys]
+                items_with_keys.sort(key=lambda t: t[1])
+                order = [it[0] for it in items_with_keys]
 
             if prioritized:
-                prioritized_tokens = [render_when_node(p) for p in prioritized]
-                remaining = [c for c in sorted_children if render_when_node(c) not in set(prioritized_tokens)]
-                merged = prioritized + remaining
-            else:
-                merged = sorted_children
+                prioritized_tokens = {toks[i] for i in prioritized}
+                order = prioritized + [i for i in order if toks[i] not in prioritized_tokens]
 
             unique: list[WhenNode] = []
             seen = set()
-            for c in merged:
-                tok = render_when_node(c)
+            for i in order:
+                tok = toks[i]
                 if tok in seen:
                     continue
                 seen.add(tok)
-                unique.append(c)
+                unique.append(children[i])
             node.children = unique
+            node._cached = None
         elif isinstance(node, WhenOr):
             # recurse first
             for child in node.children:
@@ -1238,22 +1233,23 @@ def canonicalize_when(when_val: str, mode: str = 'config-first', negation_mode:
                     items.append(c)
 
             # sort OR operands deterministically so equivalent ASTs render the same
-            indexed = list(enumerate(items))
-            indexed.sort(key=lambda it: (natural_key_case_sensitive(render_when_node(it[1])), it[0]))
-            sorted_children = [it[1] for it in indexed]
+            toks = [render_when_node(c) for c in items]
+            order = sorted(range(len(items)), key=lambda i: (natural_key_case_sensitive(toks[i]), i))
 
             # remove duplicates while preserving sorted order
             unique: list[WhenNode] = []
             seen = set()
-            for c in sorted_children:
-                tok = render_when_node(c)
+            for i in order:
+                tok = toks[i]
                 if tok in seen:
                     continue
                 seen.add(tok)
-                unique.append(c)
+                unique.append(items[i])
             node.children = unique
+            node._cached = None
         elif isinstance(node, WhenNot):
             sort_and_nodes(node.child)
+            node._cached = None
 
     ast = parse_when(when_val)
     try:
@@ -1295,6 +1291,7 @@ def canonicalize_when(when_val: str, mode: str = 'config-first', negation_mode:
 
     def _clear_parens(node: WhenNode):
         node.parens = False
+        node._cached = None
         if isinstance(node, WhenLeaf):
             return
         if isinstance(node, WhenNot):
@@ -1375,114 +1372,39 @@ def extract_preamble_postamble(text):
     Skip any brackets that appear inside comments or strings in the preamble/postamble.
     """
 
-    i = 0
     n = len(text)
-    in_string = False
-    string_char = ''
-    esc = False
-    in_line_comment = False
-    in_block_comment = False
-    start = -1
-
-    # find opening bracket, skipping comments and strings
-    while i < n:
-        ch = text[i]
-        next2 = text[i:i + 2] if i + 2 <= n else ''
 
-        if in_line_comment:
-            if ch == '\n':
-                in_line_comment = False
-            i += 1
-            continue
-        if in_block_comment:
-            if next2 == '*/':
-                in_block_comment = False
-                i += 2
-            else:
-                i += 1
-            continue
-        if next2 == '//':
-            in_line_comment = True
-            i += 2
-            continue
-        if next2 == '/*':
-            in_block_comment = True
-            i += 2
-            continue
-        if ch == '"' or ch == "'":
-            in_string = True
-            string_char = ch
-            i += 1
-            continue
-        if ch == '[':
-            start = i
+    # find opening bracket, skipping comments
+    skip = PREAMBLE_SKIP_RE.match
+    i = 0
+    while True:
+        i = skip(text, i).end()
+        if i >= n:
+            return '', '', text
+        if text[i] == '[':
             break
-        i += 1
+    start = i
 
-    if start == -1:
-        return '', '', text
-
-    # find matching closing bracket
+    # find matching closing bracket, skipping comments and strings
+    skip = ARRAY_SKIP_RE.match
     depth = 1
     i = start + 1
-    in_string = False
-    string_char = ''
-    esc = False
-    in_line_comment = False
-    in_block_comment = False
-    end = -1
-
-    while i < n:
+    while True:
+        i = skip(text, i).end()
+        if i >= n:
+            return '', '', text
         ch = text[i]
-        next2 = text[i:i + 2] if i + 2 <= n else ''
-
-        if in_line_comment:
-            if ch == '\n':
-                in_line_comment = False
-            i += 1
-            continue
-        if in_block_comment:
-            if next2 == '*/':
-                in_block_comment = False
-                i += 2
-            else:
-                i += 1
-            continue
-        if in_string:
-            if esc:
-                esc = False
-            elif ch == '\\':
-                esc = True
-            elif ch == string_char:
-                in_string = False
-            i += 1
-            continue
-
-        # not in string/comment
-        if next2 == '//':
-            in_line_comment = True
-            i += 2
-            continue
-        if next2 == '/*':
-            in_block_comment = True
-            i += 2
-            continue
-        if ch == '"' or ch == "'":
-            in_string = True
-            string_char = ch
-            i += 1
-            continue
         if ch == '[':
             depth += 1
         elif ch == ']':
             depth -= 1
             if depth == 0:
-                end = i
                 break
+        else:
+            # the skip stopped at its run limit
+            continue
         i += 1
-
-    if end == -1:
-        return '', '', text
+    end = i
 
     preamble = text[:start]
     postamble = text[end + 1:]
@@ -1490,44 +1412,136 @@ def extract_preamble_postamble(text):
     return preamble, array_text, postamble
 
 
-def extract_sort_keys(obj_text: str, primary: str = 'key', secondary: str | None = None, grouping: str = 'config-first', negation_mode: str = 'alpha', when_prefixes: list | None = None, when_regexes: list | None = None) -> Tuple:
-    parsed = parse_object_text(obj_text)
-    if not parsed:
-        # return a consistent fallback sort key (rank high so these sort last)
-        return (9999, [], (0,), [])
-    try:
-        key_val = str(parsed.get('key', ''))
-        when_val = str(parsed.get('when', ''))
-        canonical_when = canonicalize_when(
-            when_val, mode=grouping, negation_mode=negation_mode, when_prefixes=when_prefixes, when_regexes=when_regexes)
-        sortable_when = sortable_when_key(
-            when_val, mode=grouping, negation_mode=negation_mode, when_prefixes=when_prefixes, when_regexes=when_regexes)
-
-        # derive the first top-level when token for grouping when primary sorting
-        first_when_token = ''
-        if canonical_when:
-            parts = WHEN_TERM_SPLIT_RE.split(canonical_when.strip())
-            if parts:
-                first_when_token = parts[0].strip()
+def when_prefix_ranks(when_prefixes: list) -> Tuple:
+    """Split when prefixes into lookups that give the position of the first matching prefix.
+
+    Returns (exact ranks, '.' prefix ranks, '.' prefixes tuple, '<viewId>' ranks); ranks are in list order.
+    """
+
+    key = tuple(when_prefixes)
+    cached = CACHE_WHEN_PREFIX_RANKS.get(key)
+    if cached is not None:
+        return cached
+
+    exact_ranks: dict = {}
+    prefix_ranks = []
+    view_id_ranks = []
+    for i, pref in enumerate(key):
+        if not pref:
+            continue
+        if pref.endswith('.'):
+            prefix_ranks.append((pref, i))
+        elif '<viewId>' in pref:
+            prefix, suffix = pref.split('<viewId>', 1)
+            view_id_ranks.append((prefix, suffix, i))
+        else:
+            exact_ranks.setdefault(pref, i)
+
+    result = (exact_ranks, tuple(prefix_ranks), tuple(pref for pref, _ in prefix_ranks), tuple(view_id_ranks))
+    CACHE_WHEN_PREFIX_RANKS[key] = result
+    return result
+
+
+def _build_sort_key(primary: str = 'key', secondary: str | None = None, grouping: str = 'config-first', negation_mode: str = 'alpha', when_prefixes: list | None = None, when_regexes: list | None = None, with_when: bool = False):
+    """Return a one-argument sort key function for object texts, specialized for the given options.
+
+    Everything that depends only on the options (field order, leading rank, when prefix lookups and
+    the negation-mode grouping key) is decided here once, not per object. With with_when, the
+    function returns (sort key, canonical when) so callers can reuse the canonical form.
+    """
+
+    # field order: primary, then secondary (if provided and different), then any remaining fields
+    fields = ['when' if primary == 'when' else 'key']
+    if secondary and secondary != primary:
+        fields.append('when' if secondary == 'when' else 'key')
+    if 'when' not in (primary, secondary):
+        fields.append('when')
+    if 'key' not in (primary, secondary):
+        fields.append('key')
+    fields = tuple(fields)
+
+    # a when-primary key leads with its int match rank; otherwise prefer a low rank when primary is 'key'
+    when_primary = primary == 'when'
+    lead_rank = None if when_primary else (0 if primary == 'key' else 9999)
+
+    # special-case: when primary is key and secondary is when, ensure strict key-first ordering by returning a simple tuple: (rank, key, when_specificity, when_sortable)
+    key_then_when = primary == 'key' and secondary == 'when'
+
+    prefix_lookups = when_prefix_ranks(when_prefixes) if when_prefixes else None
+    regex_rank_offset = len(when_prefixes) if when_prefixes else 0
+
+    def _token_rank(first_when_token: str) -> int:
+        lid = first_when_token
+        if lid.startswith('(') and lid.endswith(')'):
+            lid = lid[1:-1].strip()
+        if lid.startswith('!'):
+            lid = lid[1:].lstrip()
+        return FOCUS_TOKENS_MAP.get(lid, POSITIONAL_TOKENS_MAP.get(lid, VISIBILITY_TOKENS_MAP.get(lid, 9999)))
+
+    if negation_mode == 'natural':
+        def when_grouping(sortable_when, first_when_token):
+            return natural_key(sortable_when.lstrip('!'))
+    elif negation_mode == 'positive':
+        # prioritize token-list ordering (FOCUS -> POSITIONAL -> VISIBILITY), based on the first_when_token
+        def when_grouping(sortable_when, first_when_token):
+            is_neg = 1 if sortable_when.startswith('!') else 0
+            return (is_neg, _token_rank(first_when_token), natural_key_case_sensitive(sortable_when.lstrip('!')))
+    elif negation_mode in ('beta', 'positive-natural'):
+        # positive-natural: prefer non-negated then natural base ordering
+        def when_grouping(sortable_when, first_when_token):
+            is_neg = 1 if sortable_when.startswith('!') else 0
+            return (is_neg, natural_key(sortable_when.lstrip('!')))
+    elif negation_mode == 'negative':
+        def when_grouping(sortable_when, first_when_token):
+            is_neg = 0 if sortable_when.startswith('!') else 1
+            return (is_neg, _token_rank(first_when_token), natural_key_case_sensitive(sortable_when.lstrip('!')))
+    elif negation_mode == 'negative-natural':
+        def when_grouping(sortable_when, first_when_token):
+            is_neg = 0 if sortable_when.startswith('!') else 1
+            return (is_neg, natural_key(sortable_when.lstrip('!')))
+    else:
+        # alpha (and any other mode)
+        def when_grouping(sortable_when, first_when_token):
+            return natural_key_case_sensitive(sortable_when)
+
+    def sort_key_and_when(obj_text: str) -> Tuple[Tuple, str]:
+        parsed = parse_object_text(obj_text)
+        if not parsed:
+            # return a consistent fallback sort key (rank high so these sort last)
+            return (9999, [], (0,), []), ''
+        sortable_when = ''
+        try:
+            key_val = str(parsed.get('key', ''))
+            when_val = str(parsed.get('when', ''))
+            # the canonical form doubles as the sortable when key (negations are preserved)
+            sortable_when = canonicalize_when(
+                when_val, mode=grouping, negation_mode=negation_mode, when_prefixes=when_prefixes, when_regexes=when_regexes)
+
+            # derive the first top-level when token for grouping when primary sorting
+            first_when_token = ''
+            if sortable_when:
+                first_when_token = _first_when_term(sortable_when)
                 # remove surrounding parentheses and leading negation for grouping
                 while first_when_token.startswith('(') and first_when_token.endswith(')'):
                     first_when_token = first_when_token[1:-1].strip()
                 if first_when_token.startswith('!'):
                     first_when_token = first_when_token[1:].lstrip()
 
-        # special-case: when primary is key and secondary is when, ensure strict key-first ordering by returning a simple tuple: (rank, key, when_specificity, when_sortable)
-        if primary == 'key' and secondary == 'when':
-            norm = normalize_key_for_compare(key_val)
-            key_token = natural_key(norm)
-            spec = when_specificity(when_val)
-            when_token = natural_key_case_sensitive(sortable_when)
-            return (0, key_token, spec, when_token)
+            if key_then_when:
+                key_token = natural_key(normalize_key_for_compare(key_val))
+                return (0, key_token, when_specificity(when_val), natural_key_case_sensitive(sortable_when)), sortable_when
 
-        tokens = []
+            tokens = [] if lead_rank is None else [lead_rank]
+            for field in fields:
+                if field == 'key':
+                    # use normalized key comparison (consistent modifier ordering)
+                    tokens.append(natural_key(normalize_key_for_compare(key_val)))
+                    continue
 
-        def append_when():
-            if primary == 'when':
-                first_key = natural_key_case_sensitive(first_when_token)
+                if not when_primary:
+                    tokens.append(when_specificity(when_val))
+                    tokens.append(natural_key_case_sensitive(sortable_when))
+                    continue
 
                 # compute an optional priority rank based on given when_prefixes
                 match_rank = 9999
@@ -1536,24 +1550,23 @@ def extract_sort_keys(obj_text: str, primary: str = 'key', secondary: str | None
                     left_id = left_id[1:-1].strip()
                 if left_id.startswith('!'):
                     left_id = left_id[1:].lstrip()
-                if when_prefixes:
-                    for i, pref in enumerate(when_prefixes):
-                        if not pref:
-                            continue
-                        # support literal prefix ending in '.' to match startswith
-                        if pref.endswith('.'):
-                            if left_id.startswith(pref):
-                                match_rank = i
-                                break
-                        elif '<viewId>' in pref:
-                            prefix, suffix = pref.split('<viewId>', 1)
-                            if left_id.startswith(prefix) and left_id.endswith(suffix):
-                                match_rank = i
+                if prefix_lookups is not None:
+                    exact_ranks, prefix_ranks, prefixes, view_id_ranks = prefix_lookups
+                    match_rank = exact_ranks.get(left_id, 9999)
+                    # support literal prefix ending in '.' to match startswith
+                    if prefixes and left_id.startswith(prefixes):
+                        for pref, i in prefix_ranks:
+                            if i > match_rank:
                                 break
-                        else:
-                            if left_id == pref:
+                            if left_id.startswith(pref):
                                 match_rank = i
                                 break
+                    for prefix, suffix, i in view_id_ranks:
+                        if i > match_rank:
+                            break
+                        if left_id.startswith(prefix) and left_id.endswith(suffix):
+                            match_rank = i
+                            break
                 if when_regexes and match_rank == 9999:
                     for i, pat in enumerate(when_regexes):
                         try:
@@ -1564,102 +1577,35 @@ def extract_sort_keys(obj_text: str, primary: str = 'key', secondary: str | None
                             except Exception:
                                 ok = False
                         if ok:
-                            match_rank = (len(when_prefixes)
-                                          if when_prefixes else 0) + i
+                            match_rank = regex_rank_offset + i
                             break
-                spec_key = when_specificity(when_val)
 
                 tokens.append(match_rank)
-                if negation_mode == 'alpha':
-                    grouping = natural_key_case_sensitive(sortable_when)
-                elif negation_mode == 'natural':
-                    base = sortable_when.lstrip('!')
-                    grouping = natural_key(base)
-                elif negation_mode in ('positive', 'beta', 'positive-natural'):
-                    # positive-natural: prefer non-negated then natural base ordering
-                    is_neg = 1 if sortable_when.startswith('!') else 0
-                    base = sortable_when.lstrip('!')
-
-                    # prioritize token-list ordering (FOCUS -> POSITIONAL -> VISIBILITY)
-                    if negation_mode == 'positive':
-                        # compute sub-rank based on the first_when_token
-                        lid = first_when_token
-                        if lid.startswith('(') and lid.endswith(')'):
-                            lid = lid[1:-1].strip()
-                        if lid.startswith('!'):
-                            lid = lid[1:].lstrip()
-                        f_rank = FOCUS_TOKENS_MAP.get(lid, POSITIONAL_TOKENS_MAP.get(lid, VISIBILITY_TOKENS_MAP.get(lid, 9999)))
-                        grouping = (is_neg, f_rank, natural_key_case_sensitive(base))
-                    else:
-                        grouping = (is_neg, natural_key(base))
-                elif negation_mode in ('negative', 'negative-natural'):
-                    is_neg = 0 if sortable_when.startswith('!') else 1
-                    base = sortable_when.lstrip('!')
-                    if negation_mode == 'negative':
-                        lid = first_when_token
-                        if lid.startswith('(') and lid.endswith(')'):
-                            lid = lid[1:-1].strip()
-                        if lid.startswith('!'):
-                            lid = lid[1:].lstrip()
-                        f_rank = FOCUS_TOKENS_MAP.get(lid, POSITIONAL_TOKENS_MAP.get(lid, VISIBILITY_TOKENS_MAP.get(lid, 9999)))
-                        grouping = (is_neg, f_rank, natural_key_case_sensitive(base))
-                    else:
-                        grouping = (is_neg, natural_key(base))
-                else:
-                    grouping = natural_key_case_sensitive(sortable_when)
-
                 # this makes matched groups easier to inspect
                 if match_rank != 9999:
                     # prefer normalized key ordering for stability: modifiers normalized
-                    norm_key = normalize_key_for_compare(key_val)
-                    tokens.append(natural_key(norm_key))
-                    tokens.append(spec_key)
-                    tokens.append(grouping)
+                    tokens.append(natural_key(normalize_key_for_compare(key_val)))
                 else:
                     # default behavior: include first_when token so grouping remains primary, then specificity and grouping ordering
-                    tokens.append(first_key)
-                    tokens.append(spec_key)
-                    tokens.append(grouping)
-                return
-
-            tokens.append(when_specificity(when_val))
-            tokens.append(natural_key_case_sensitive(sortable_when))
-
-        def append_key():
-            # use normalized key comparison (consistent modifier ordering)
-            norm = normalize_key_for_compare(key_val)
-            tokens.append(natural_key(norm))
-
-        # primary
-        if primary == 'when':
-            append_when()
-        else:
-            append_key()
+                    tokens.append(natural_key_case_sensitive(first_when_token))
+                tokens.append(when_specificity(when_val))
+                tokens.append(when_grouping(sortable_when, first_when_token))
+            return tuple(tokens), sortable_when
+        except Exception:
+            # return a key with the same structural types as a normal sort key: (int rank, list key, tuple specificity, list grouping)
+            return (9999, [], (0,), []), sortable_when
 
-        # secondary (if provided and different)
-        if secondary and secondary != primary:
-            if secondary == 'when':
-                append_when()
-            else:
-                append_key()
-
-        # append any remaining fields not yet included
-        if 'when' not in (primary, secondary):
-            append_when()
-        if 'key' not in (primary, secondary):
-            append_key()
-
-        if tokens:
-            if not isinstance(tokens[0], int):
-                # prefer a low rank when primary is 'key'
-                if primary == 'key':
-                    tokens.insert(0, 0)
-                else:
-                    tokens.insert(0, 9999)
-        return tuple(tokens)
-    except Exception:
-        # return a key with the same structural types as a normal sort key: (int rank, list key, tuple specificity, list grouping)
-        return (9999, [], (0,), [])
+    if with_when:
+        return sort_key_and_when
+
+    def sort_key(obj_text: str) -> Tuple:
+        return sort_key_and_when(obj_text)[0]
+
+    return sort_key
+
+
+def extract_sort_keys(obj_text: str, primary: str = 'key', secondary: str | None = None, grouping: str = 'config-first', negation_mode: str = 'alpha', when_prefixes: list | None = None, when_regexes: list | None = None) -> Tuple:
+    return _build_sort_key(primary, secondary, grouping, negation_mode, when_prefixes, when_regexes)(obj_text)
 
 
 def group_objects_with_comments(array_text: str) -> Tuple[List[Tuple[str, str]], str]:
@@ -1672,65 +1618,21 @@ def group_objects_with_comments(array_text: str) -> Tuple[List[Tuple[str, str]],
     obj_start: int | None = None
     depth = 0
 
-    in_string = False
-    string_char = ''
-    esc = False
-    in_line_comment = False
-    in_block_comment = False
+    # skip comments and strings straight to the next brace
+    skip = OBJECT_SKIP_RE.match
 
-    while i < n:
+    while True:
+        i = skip(array_text, i).end()
+        if i >= n:
+            break
         ch = array_text[i]
-        next2 = array_text[i:i + 2] if i + 2 <= n else ''
-
-        if in_line_comment:
-            if ch == '\n':
-                in_line_comment = False
-            i += 1
-            continue
-
-        if in_block_comment:
-            if next2 == '*/':
-                in_block_comment = False
-                i += 2
-            else:
-                i += 1
-            continue
-
-        if in_string:
-            if esc:
-                esc = False
-            elif ch == '\\':
-                esc = True
-            elif ch == string_char:
-                in_string = False
-            i += 1
-            continue
-
-        if next2 == '//':
-            in_line_comment = True
-            i += 2
-            continue
-
-        if next2 == '/*':
-            in_block_comment = True
-            i += 2
-            continue
-
-        if ch == '"' or ch == "'":
-            in_string = True
-            string_char = ch
-            i += 1
-            continue
 
         if obj_start is None:
             if ch == '{':
                 comments = array_text[comments_start:i]
                 obj_start = i
                 depth = 1
-            i += 1
-            continue
-
-        if ch == '{':
+        elif ch == '{':
             depth += 1
         elif ch == '}':
             depth -= 1
@@ -1740,6 +1642,9 @@ def group_objects_with_comments(array_text: str) -> Tuple[List[Tuple[str, str]],
                 groups.append((comments, obj_text))
                 obj_start = None
                 comments_start = obj_end
+        else:
+            # the skip stopped at its run limit
+            continue
         i += 1
 
     trailing_comments = array_text[comments_start:]
@@ -1783,9 +1688,11 @@ def normalize_key_for_compare(key_value):
 
     if not key_value:
         return ""
-    key_value = str(key_value).strip().lower()
-    if not key_value:
-        return ""
+    raw = str(key_value)
+    cached = CACHE_NORMALIZED_KEY.get(raw)
+    if cached is not None:
+        return cached
+    key_value = raw.strip().lower()
 
     chords = [p for p in key_value.split() if p.strip()]
     out_chords = []
@@ -1799,12 +1706,13 @@ def normalize_key_for_compare(key_value):
             out_chords.append("+".join(mods + [lit]))
         else:
             out_chords.append(lit)
-    return " ".join(out_chords)
+    out = " ".join(out_chords)
+    CACHE_NORMALIZED_KEY[raw] = out
+    return out
 
 
 def normalize_operand(text: str) -> str:
-    collapsed = WHITESPACE_RE.sub(' ', text).strip()
-    return collapsed
+    return ' '.join(text.split())
 
 
 def normalize_when_in_object(obj_text: str, mode: str = 'config-first', negation_mode: str = 'alpha', when_prefixes: list | None = None, when_regexes: list | None = None) -> Tuple[str, bool]:
@@ -1854,17 +1762,10 @@ def normalize_when_in_object(obj_text: str, mode: str = 'config-first', negation
     qstart = i
 
     # find matching closing quote, honoring backslash escapes
-    j = qstart + 1
-    while j < n:
-        ch = obj_text[j]
-        if ch == '\\':
-            j += 2
-            continue
-        if ch == '"':
-            break
-        j += 1
-    if j >= n:
+    match = STRING_LITERAL_RE.match(obj_text, qstart)
+    if not match:
         return obj_text, False
+    j = match.end() - 1
 
     # build JSON-escaped inner string reliably
     try:
@@ -1873,6 +1774,15 @@ def normalize_when_in_object(obj_text: str, mode: str = 'config-first', negation
         escaped = normalized.replace('\\', '\\\\').replace('"', '\\"')
 
     new_obj = obj_text[:qstart + 1] + escaped + obj_text[j:]
+
+    # when the replaced literal is certainly the top-level `when` value (the only "when" in the
+    # text, no \u escapes that could spell another, nothing but whitespace before the colon),
+    # seed the object cache so the rewritten text is not parsed again
+    if obj_text.count('"when"') == 1 and '\\u' not in obj_text and not obj_text[idx + 6:colon].strip():
+        obj_str = _object_cache_key(new_obj)
+        if obj_str is not None:
+            CACHE_JSON_OBJECT[obj_str] = {**parsed, 'when': normalized}
+
     return new_obj, True
 
 
@@ -1894,21 +1804,28 @@ def object_has_trailing_comma(obj_text: str) -> bool:
     return False
 
 
+def _object_cache_key(obj_text: str) -> str | None:
+    """Return the raw object string (including comments), the first '{' through the last '}'."""
+
+    if not obj_text:
+        return None
+    start = obj_text.find('{')
+    end = obj_text.rfind('}')
+    if start == -1 or end < start:
+        return None
+    return obj_text[start:end + 1]
+
+
 def parse_object_text(obj_text: str):
     """Parse an object text (including braces) into a dict and cache the result.
 
     Returns the parsed dict or None on failure.
     """
 
-    if not obj_text:
-        return None
-
-    # use the raw object string (including comments) as cache key
-    m = OBJ_RE.search(obj_text)
-    if not m:
+    obj_str = _object_cache_key(obj_text)
+    if obj_str is None:
         return None
 
-    obj_str = m.group(0)
     cached = CACHE_JSON_OBJECT.get(obj_str)
 
     if cached is not None:
@@ -1917,79 +1834,83 @@ def parse_object_text(obj_text: str):
     try:
         clean = strip_json_comments(obj_str)
         clean = strip_trailing_commas(clean)
-        parsed = json.loads(clean)
+        try:
+            parsed = _json_loads(clean)
+        except Exception:
+            # orjson is stricter (NaN, integers beyond 64 bits); json.loads decides those
+            parsed = json.loads(clean)
         CACHE_JSON_OBJECT[obj_str] = parsed
         return parsed
     except Exception:
         return None
 
 
-def parse_when(expr: str) -> WhenNode:
-    tokens = tokenize_when(expr)
-    idx = 0
+class _WhenParser:
+    """Recursive-descent parser over when-clause tokens; binds ! tighter than &&, && tighter than ||."""
 
-    def peek():
-        return tokens[idx] if idx < len(tokens) else None
+    __slots__ = ('tokens', 'idx')
 
-    def consume():
-        nonlocal idx
-        t = tokens[idx] if idx < len(tokens) else None
-        idx += 1
-        return t
+    OPEN = ('OP', '(')
+    CLOSE = ('OP', ')')
+    NOT = ('OP', '!')
+    AND = ('OP', '&&')
+    OR = ('OP', '||')
 
-    def parse_primary():
-        t = peek()
-        if not t:
-            return WhenLeaf('')
-        if t[0] == 'OP' and t[1] == '(':
-            consume()  # (
-            node = parse_or()
-            next_token = peek()
-            if next_token and next_token[0] == 'OP' and next_token[1] == ')':
-                consume()
+    def __init__(self, tokens: list):
+        # the END sentinel is never consumed, so lookahead needs no bounds check
+        self.tokens = tokens + [('END', '')]
+        self.idx = 0
+
+    def parse_primary(self) -> WhenNode:
+        t = self.tokens[self.idx]
+        if t == self.OPEN:
+            self.idx += 1
+            node = self.parse_or()
+            if self.tokens[self.idx] == self.CLOSE:
+                self.idx += 1
                 node.parens = True
             return node
         if t[0] == 'OPERAND':
-            consume()
+            self.idx += 1
             return WhenLeaf(t[1])
         return WhenLeaf('')
 
-    def parse_unary():
-        t = peek()
-        if t and t[0] == 'OP' and t[1] == '!':
-            consume()
-            return WhenNot(parse_unary())
-        return parse_primary()
-
-    def parse_and():
-        node = parse_unary()
+    def parse_unary(self) -> WhenNode:
+        tokens = self.tokens
+        negations = 0
+        while tokens[self.idx] == self.NOT:
+            self.idx += 1
+            negations += 1
+        node = self.parse_primary()
+        for _ in range(negations):
+            node = WhenNot(node)
+        return node
+
+    def parse_and(self) -> WhenNode:
+        tokens = self.tokens
+        node = self.parse_unary()
+        if tokens[self.idx] != self.AND:
+            return node
         children = [node]
-        while True:
-            t = peek()
-            if t and t[0] == 'OP' and t[1] == '&&':
-                consume()
-                children.append(parse_unary())
-            else:
-                break
-        if len(children) == 1:
-            return children[0]
+        while tokens[self.idx] == self.AND:
+            self.idx += 1
+            children.append(self.parse_unary())
         return WhenAnd(children)
 
-    def parse_or():
-        node = parse_and()
+    def parse_or(self) -> WhenNode:
+        tokens = self.tokens
+        node = self.parse_and()
+        if tokens[self.idx] != self.OR:
+            return node
         children = [node]
-        while True:
-            t = peek()
-            if t and t[0] == 'OP' and t[1] == '||':
-                consume()
-                children.append(parse_and())
-            else:
-                break
-        if len(children) == 1:
-            return children[0]
+        while tokens[self.idx] == self.OR:
+            self.idx += 1
+            children.append(self.parse_and())
         return WhenOr(children)
 
-    return parse_or()
+
+def parse_when(expr: str) -> WhenNode:
+    return _WhenParser(tokenize_when(expr)).parse_or()
 
 
 def render_when_node(node: WhenNode) -> str:
@@ -1999,41 +1920,10 @@ def render_when_node(node: WhenNode) -> str:
     return inner
 
 
-def sortable_when_key(when_val: str, mode: str = 'config-first', negation_mode: str = 'alpha', when_prefixes: list | None = None, when_regexes: list | None = None) -> str:
-    if not when_val:
-        return ''
-
-    cache_key = (
-        when_val,
-        mode,
-        negation_mode,
-        None if when_prefixes is None else tuple(when_prefixes),
-        None if when_regexes is None else tuple(when_regexes),
-    )
-
-    cached = CACHE_SORTABLE_WHEN.get(cache_key)
-
-    if cached is not None:
-        return cached
-
-    # preserve negation for stable sorting
-    when = canonicalize_when(when_val, mode=mode, negation_mode=negation_mode, when_prefixes=when_prefixes, when_regexes=when_regexes)
-
-    try:
-        CACHE_SORTABLE_WHEN[cache_key] = when
-    except Exception:
-        pass
-
-    return when
-
-
 def strip_json_comments(text):
-    def replacer(match):
-        s = match.group(0)
-        if s.startswith('/'):
-            return ''
-        return s
-    return COMMENT_RE.sub(replacer, text)
+    if '/' not in text:
+        return text
+    return COMMENT_RE.sub(r'\1', text)
 
 
 def strip_trailing_commas(text):
@@ -2046,114 +1936,83 @@ def tokenize_when(expr: str):
     buf = ''
     i = 0
     n = len(expr)
-    in_single = False
-    in_double = False
-    in_regex = False
-    regex_escape = False
     prev_nonspace = ''
-
-    def flush_buf():
-        nonlocal buf
-        if buf.strip():
-            tokens.append(('OPERAND', normalize_operand(buf)))
-        buf = ''
+    plain = WHEN_PLAIN_RE.match
+    quoted = WHEN_QUOTED_RE.match
+    regex_literal = WHEN_REGEX_LITERAL_RE.match
 
     while i < n:
-        ch = expr[i]
-
-        if in_single:
-            buf += ch
-            if ch == '\\':
-                if i + 1 < n:
-                    buf += expr[i + 1]
-                    i += 1
-            elif ch == "'":
-                in_single = False
-            i += 1
-            continue
-
-        if in_double:
-            buf += ch
-            if ch == '\\':
-                if i + 1 < n:
-                    buf += expr[i + 1]
-                    i += 1
-            elif ch == '"':
-                in_double = False
-            i += 1
-            continue
-
-        if in_regex:
-            buf += ch
-            if regex_escape:
-                regex_escape = False
-            elif ch == '\\':
-                regex_escape = True
-            elif ch == '/':
-                in_regex = False
-            i += 1
-            continue
-
-        if ch.isspace():
-            buf += ch
-            i += 1
+        # runs without quotes, operators or slashes go straight into the operand
+        m = plain(expr, i)
+        if m:
+            run = m.group()
+            buf += run
+            run = run.rstrip()
+            if run:
+                prev_nonspace = run[-1]
+            i = m.end()
             continue
 
-        if ch == "'":
-            in_single = True
-            buf += ch
-            i += 1
-            continue
+        ch = expr[i]
 
-        if ch == '"':
-            in_double = True
-            buf += ch
-            i += 1
+        if ch == "'" or ch == '"':
+            j = quoted(expr, i).end()
+            buf += expr[i:j]
+            i = j
             continue
 
         if ch == '/' and prev_nonspace == '~':
-            in_regex = True
-            buf += ch
-            i += 1
+            j = regex_literal(expr, i).end()
+            buf += expr[i:j]
+            i = j
             continue
 
-        if expr.startswith('&&', i) or expr.startswith('||', i):
-            flush_buf()
-            tokens.append(('OP', expr[i:i + 2]))
+        if (ch == '&' or ch == '|') and expr[i + 1:i + 2] == ch:
+            if buf.strip():
+                tokens.append(('OPERAND', normalize_operand(buf)))
+            buf = ''
+            tokens.append(('OP', ch + ch))
             i += 2
             prev_nonspace = ''
             continue
 
-        if ch in '()':
-            flush_buf()
+        if ch == '(' or ch == ')':
+            if buf.strip():
+                tokens.append(('OPERAND', normalize_operand(buf)))
+            buf = ''
             tokens.append(('OP', ch))
             i += 1
             prev_nonspace = ch
             continue
 
-        if ch == '!':
-            nxt = expr[i + 1] if i + 1 < n else ''
-            if nxt == '=':
-                buf += ch
-                i += 1
-                prev_nonspace = ch
-                continue
-            if not buf.strip():
-                flush_buf()
-                tokens.append(('OP', '!'))
-                i += 1
-                prev_nonspace = '!'
-                continue
+        if ch == '!' and expr[i + 1:i + 2] != '=' and not buf.strip():
+            buf = ''
+            tokens.append(('OP', '!'))
+            i += 1
+            prev_nonspace = '!'
+            continue
 
+        # '!', '!=', a lone '&' or '|', or a '/' that does not start a regex
         buf += ch
-        if not ch.isspace():
-            prev_nonspace = ch
+        prev_nonspace = ch
         i += 1
 
-    flush_buf()
+    if buf.strip():
+        tokens.append(('OPERAND', normalize_operand(buf)))
     return tokens
 
 
+def _first_when_term(when_val: str) -> str:
+    """Return the stripped text before the first && or || (the whole clause if there is neither)."""
+
+    cut = len(when_val)
+    for op in ('&&', '||'):
+        pos = when_val.find(op, 0, cut)
+        if pos != -1:
+            cut = pos
+    return when_val[:cut].strip()
+
+
 def when_specificity(when_val: str) -> Tuple[int]:
     """Heuristic specificity scorer for a when clause. Lower is broader.
 
@@ -2168,7 +2027,9 @@ def when_specificity(when_val: str) -> Tuple[int]:
     if not key:
         res = (0,)
     else:
-        term_count = len(WHEN_TERM_SPLIT_RE.split(key.strip()))
+        # one more term than there are operators; '&' and '|' never overlap, so the two
+        # counts add up to the number of && / || separators
+        term_count = key.count('&&') + key.count('||') + 1
         res = (term_count,)
     try:
         CACHE_WHEN_SPECIFICITY[key] = res
@@ -2273,14 +2134,6 @@ def main(argv: List[str] | None = None) -> int:
         when_regexes=when_regexes,
     )
 
-    sorted_groups = _sort_groups_with_grouping_mode(
-        sorted_groups,
-        grouping_mode,
-        negation_mode,
-        when_prefixes=when_prefixes,
-        when_regexes=when_regexes,
-    )
-
     if grouping_mode == 'focal-invariant':
         sorted_groups = _partition_focus_groups_to_end(sorted_groups)
 
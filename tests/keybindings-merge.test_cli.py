@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+(C) 2026 Joseph Tingiris (joseph.tingiris@gmail.com)
+
+Focused CLI tests for `bin/keybindings-merge.py`.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from textwrap import dedent
+
+
+SCRIPT = os.path.normpath(
+    os.path.join(os.path.dirname(__file__), "..", "bin", "keybindings-merge.py")
+)
+REPO_ROOT = os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+
+LEFT = dedent(
+    """
+    // left preamble [with brackets] and "quotes"
+    [
+      // left comment for ctrl+a
+      {
+        "key": "ctrl+a",
+        "command": "left.a", // trailing comment
+        "when": "editorTextFocus",
+        "args": { "text": "has // slashes, /* stars */ and [ ] { } inside" },
+      },
+      /* block comment { [ , */
+      {
+        "key": "ctrl+b",
+        "command": "left.b",
+        "args": ["x", "y", ],
+      },
+      {
+        "key": "ctrl+\\"q\\"",
+        "command": "left.escaped\\\\"
+      }
+    ]
+    // left postamble
+    """
+)
+
+RIGHT = dedent(
+    """
+    [
+      {
+        "key": "ctrl+a",
+        "command": "right.a",
+        "when": "editorTextFocus"
+      },
+      {
+        "key": "ctrl+z",
+        "command": "right.z"
+      }
+    ]
+    """
+)
+
+
+def run_merge(left_text: str, right_text: str, args: list[str] | None = None) -> tuple[subprocess.CompletedProcess[bytes], str]:
+    """Run the merge script on two temporary files and return (process, merged output)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        left = os.path.join(tmp, "left.json")
+        right = os.path.join(tmp, "right.json")
+        out = os.path.join(tmp, "merged.json")
+        with open(left, "w", encoding="utf-8") as handle:
+            handle.write(left_text)
+        with open(right, "w", encoding="utf-8") as handle:
+            handle.write(right_text)
+        cmd = [sys.executable, SCRIPT, left, right, "--out", out]
+        if args:
+            cmd.extend(args)
+        proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=REPO_ROOT)
+        merged = ""
+        if os.path.exists(out):
+            with open(out, "r", encoding="utf-8") as handle:
+                merged = handle.read()
+        return proc, merged
+
+
+class KeybindingsMergeCliTests(unittest.TestCase):
+    """CLI behavior tests for keybindings-merge."""
+
+    def test_prefer_right_replaces_in_place(self) -> None:
+        proc, merged = run_merge(LEFT, RIGHT)
+        self.assertEqual(proc.returncode, 0, msg=proc.stderr.decode("utf-8"))
+        self.assertIn("No parse warnings.", proc.stdout.decode("utf-8"))
+        self.assertIn('"command": "right.a"', merged)
+        self.assertNotIn('"command": "left.a"', merged)
+        # the replaced item keeps its original position; new items are appended
+        self.assertLess(merged.index("right.a"), merged.index("left.b"))
+        self.assertLess(merged.index("left.escaped"), merged.index("right.z"))
+
+    def test_prefer_left_keeps_comments_and_raw_text(self) -> None:
+        proc, merged = run_merge(LEFT, RIGHT, ["--prefer", "left"])
+        self.assertEqual(proc.returncode, 0, msg=proc.stderr.decode("utf-8"))
+        self.assertIn('"command": "left.a", // trailing comment', merged)
+        self.assertIn("has // slashes, /* stars */ and [ ] { } inside", merged)
+        self.assertIn("/* block comment { [ , */", merged)
+        self.assertTrue(merged.startswith("\n// left preamble [with brackets]"))
+        self.assertTrue(merged.rstrip().endswith("// left postamble"))
+        self.assertEqual(merged.count('"key": "ctrl+a"'), 1)
+
+    def test_base_right_uses_right_wrapper(self) -> None:
+        proc, merged = run_merge(LEFT, RIGHT, ["--base", "right"])
+        self.assertEqual(proc.returncode, 0, msg=proc.stderr.decode("utf-8"))
+        self.assertNotIn("left preamble", merged)
+        self.assertNotIn("left postamble", merged)
+
+    def test_unparsable_item_warns_and_is_preserved(self) -> None:
+        left = '[\n  { "key": \'single\', "command": "bad" },\n  { "key": "ctrl+y", "command": "ok" }\n]\n'
+        proc, merged = run_merge(left, "[]\n")
+        self.assertEqual(proc.returncode, 0, msg=proc.stderr.decode("utf-8"))
+        self.assertIn("left file item #0 could not be parsed as JSON", proc.stdout.decode("utf-8"))
+        self.assertIn("{ \"key\": 'single', \"command\": \"bad\" }", merged)
+
+    def test_missing_array_exits_2(self) -> None:
+        proc, _ = run_merge("{}\n", RIGHT)
+        self.assertEqual(proc.returncode, 2)
+        self.assertIn("No top-level '[' found", proc.stderr.decode("utf-8"))
+
+
+if __name__ == "__main__":
+    unittest.main()
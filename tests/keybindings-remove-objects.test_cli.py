@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+(C) 2026 Joseph Tingiris (joseph.tingiris@gmail.com)
+
+Focused CLI tests for `bin/keybindings-remove-objects.py`.
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+from textwrap import dedent
+
+
+SCRIPT = os.path.normpath(
+    os.path.join(os.path.dirname(__file__), "..", "bin", "keybindings-remove-objects.py")
+)
+REPO_ROOT = os.path.normpath(os.path.join(os.path.dirname(__file__), ".."))
+
+INPUT = dedent(
+    """
+    // preamble [with brackets] and "quotes" /* [ */
+    [
+      // comment for ctrl+a {
+      {
+        "key": "ctrl+a",
+        "command": "cursorDown", // trailing comment
+        "when": "editorTextFocus",
+      },
+      /* block comment { [ , */ {
+        "key": "ctrl+b",
+        "command": "cursorUp",
+        "args": { "text": "has } and ] inside" }
+      }, // after ctrl+b
+      {
+        "key": "ctrl+c",
+        "command": "TODO.copy"
+      }
+    ]
+    // postamble ] [
+    """
+)
+
+
+def run_remove(args: list[str], text: str = INPUT) -> tuple[subprocess.CompletedProcess[bytes], str]:
+    """Run the remove script with `text` on stdin and return (process, stdout)."""
+    proc = subprocess.run(
+        [sys.executable, SCRIPT, *args],
+        input=text.encode("utf-8"),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=REPO_ROOT,
+    )
+    return proc, proc.stdout.decode("utf-8")
+
+
+class KeybindingsRemoveObjectsCliTests(unittest.TestCase):
+    """CLI behavior tests for keybindings-remove-objects."""
+
+    def test_no_match_keeps_text(self) -> None:
+        proc, out = run_remove(["command", "nosuchcommand"])
+        self.assertEqual(proc.returncode, 0, msg=proc.stderr.decode("utf-8"))
+        self.assertEqual(out, INPUT)
+
+    def test_remove_by_attribute(self) -> None:
+        proc, out = run_remove(["command", "cursorDown"])
+        self.assertEqual(proc.returncode, 0, msg=proc.stderr.decode("utf-8"))
+        self.assertNotIn('"ctrl+a"', out)
+        self.assertNotIn("// comment for ctrl+a {", out)
+        self.assertIn('"has } and ] inside"', out)
+        self.assertIn("// preamble [with brackets]", out)
+        self.assertTrue(out.rstrip().endswith("// postamble ] ["))
+
+    def test_remove_last_object_drops_separator(self) -> None:
+        proc, out = run_remove(["key", "ctrl+c"])
+        self.assertEqual(proc.returncode, 0, msg=proc.stderr.decode("utf-8"))
+        self.assertNotIn("TODO.copy", out)
+        self.assertIn("} // after ctrl+b", out)
+        self.assertNotIn("},", out.split('"ctrl+b"')[1])
+
+    def test_any_matches_leading_comments(self) -> None:
+        proc, out = run_remove(["any", "comment for ctrl+a"])
+        self.assertEqual(proc.returncode, 0, msg=proc.stderr.decode("utf-8"))
+        self.assertNotIn('"ctrl+a"', out)
+        self.assertIn('"ctrl+b"', out)
+        self.assertIn('"ctrl+c"', out)
+
+    def test_non_string_values_match_their_str_form(self) -> None:
+        text = dedent(
+            """
+            // values: True 1000.0 'n'
+            [
+              { "command": "a", "args": true },
+              { "command": "b", "args": 1e3 },
+              { "command": "c", "args": { "n": 1 } }
+            ]
+            """
+        )
+        for search, removed in (("True", '"a"'), ("1000.0", '"b"'), ("'n'", '"c"')):
+            with self.subTest(search=search):
+                proc, out = run_remove(["args", search], text)
+                self.assertEqual(proc.returncode, 0, msg=proc.stderr.decode("utf-8"))
+                self.assertNotIn(removed, out)
+                self.assertEqual(out.count('"command"'), 2)
+
+    def test_non_string_value_absent_from_input(self) -> None:
+        text = '[\n  { "command": "a", "args": true },\n  { "command": "b" }\n]\n'
+        proc, out = run_remove(["args", "True"], text)
+        self.assertEqual(proc.returncode, 0, msg=proc.stderr.decode("utf-8"))
+        self.assertNotIn('"a"', out)
+        self.assertIn('"b"', out)
+
+    def test_json_extensions_accepted_by_json_loads(self) -> None:
+        text = '[\n  { "command": "foo", "args": NaN },\n  { "command": "foo", "args": 18446744073709551616 },\n  { "command": "bar" }\n]\n'
+        proc, out = run_remove(["command", "foo"], text)
+        self.assertEqual(proc.returncode, 0, msg=proc.stderr.decode("utf-8"))
+        self.assertNotIn('"foo"', out)
+        self.assertIn('"bar"', out)
+
+    def test_long_runs_without_braces(self) -> None:
+        strings = '"abc", ' * 5000
+        comments = "// c\n/* c */ " * 500
+        text = (
+            f'[\n  {strings}\n  {{ "command": "x" }},{comments}\n'
+            f'  {{ "command": "y", "args": [{strings}"z"] }} {comments},{comments}\n'
+            f'  {{ "command": "x" }}\n]\n'
+        )
+        proc, out = run_remove(["command", "x"], text)
+        self.assertEqual(proc.returncode, 0, msg=proc.stderr.decode("utf-8"))
+        self.assertNotIn('"x"', out)
+        self.assertIn('"command": "y"', out)
+        # the leading strings go with the first object; the args array is kept whole
+        self.assertEqual(out.count('"abc"'), 5000)
+        self.assertIn('"z"] }', out)
+        self.assertTrue(out.rstrip().endswith("]"))
+
+    def test_unparsable_object_is_kept(self) -> None:
+        text = '[\n  { "key": "ctrl+a" "command": "cursorDown" }\n]\n'
+        proc, out = run_remove(["command", "cursorDown"], text)
+        self.assertEqual(proc.returncode, 0, msg=proc.stderr.decode("utf-8"))
+        self.assertEqual(out, text)
+
+
+if __name__ == "__main__":
+    unittest.main()